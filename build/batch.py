@@ -0,0 +1,289 @@
+"""
+Headless batch integration.
+
+Reads (function, lower, upper) jobs from a JSONL or CSV file, or from stdin,
+integrates them across a pool of worker processes and streams one JSON result
+per line as jobs finish. Only numpy/scipy are needed: nothing here imports
+tkinter, matplotlib or sympy.
+
+Usage:
+    python batch.py jobs.jsonl -o results.jsonl --workers 4 --chunk-size 64
+    cat jobs.csv | python batch.py - --format csv
+
+A JSONL job looks like {"function": "x^2", "lower": 0, "upper": 2}; a CSV file
+needs a header with the columns function, lower and upper. An optional "id"
+field or column is copied to the result. Bounds may be "inf" or "-inf". Output
+is strict JSON: infinite bounds are written as the strings "inf"/"-inf" and a
+divergent (infinite or NaN) integral fails its job. The exit status is 1 if
+any job failed.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from integration import process_user_integration
+
+
+# Accepted spellings of the job fields
+FUNCTION_KEYS = ("function", "func", "f")
+LOWER_KEYS = ("lower", "lower_bound", "a")
+UPPER_KEYS = ("upper", "upper_bound", "b")
+
+
+def _first(job: Dict[str, Any], keys) -> Any:
+    for key in keys:
+        if key in job and job[key] not in (None, ""):
+            return job[key]
+    return None
+
+
+def read_jobs(stream: TextIO, fmt: str = "jsonl") -> Iterator[Dict[str, Any]]:
+    """
+    Lazily read jobs from a text stream.
+
+    Args:
+        stream: Open text stream with JSONL lines or CSV rows
+        fmt: "jsonl" or "csv"
+
+    Yields:
+        One dictionary per job; malformed JSON lines yield {"invalid": message}
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield {key.strip(): value.strip() if isinstance(value, str) else value
+                   for key, value in row.items() if key is not None}
+    elif fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"invalid": f"Invalid JSON: {str(e)}"}
+                continue
+            yield job if isinstance(job, dict) else {"invalid": "Job must be a JSON object"}
+    else:
+        raise ValueError(f"Unknown job format '{fmt}'")
+
+
+def _drop_non_finite(result: Dict[str, Any]) -> None:
+    """
+    Keep results valid JSON: infinite bounds become "inf"/"-inf", an infinite
+    or NaN integral fails the job, and a non-finite error estimate becomes
+    null with a warning.
+    """
+    for key in ("lower_bound", "upper_bound"):
+        if isinstance(result.get(key), float) and math.isinf(result[key]):
+            result[key] = str(result[key])
+    if not result.get("success"):
+        return
+    if not math.isfinite(result["result"]):
+        result.update(success=False, message=f"Integration failed: the integral is {result['result']} "
+                                             f"(divergent or undefined on the interval)")
+        result["result"] = result["error"] = None
+    elif not math.isfinite(result["error"]):
+        note = f"Error estimate is {result['error']}"
+        result["warning"] = f"{result['warning']} {note}" if "warning" in result else note
+        result["error"] = None
+
+
+def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Integrate a single job and time it.
+
+    Args:
+        job: Dictionary with function, lower and upper fields (and optional id)
+
+    Returns:
+        The process_user_integration result plus id, elapsed and warning fields
+    """
+    start = time.perf_counter()
+    func_str = _first(job, FUNCTION_KEYS)
+    lower = _first(job, LOWER_KEYS)
+    upper = _first(job, UPPER_KEYS)
+
+    if "invalid" in job:
+        result = {"success": False, "message": job["invalid"]}
+    elif func_str is None or lower is None or upper is None:
+        result = {"success": False, "function": func_str, "lower_bound": lower, "upper_bound": upper,
+                  "message": "Job needs function, lower and upper fields"}
+    else:
+        try:
+            bounds = float(lower), float(upper)
+            if any(math.isnan(bound) for bound in bounds):
+                raise ValueError("NaN bound")
+        except (TypeError, ValueError):
+            result = {"success": False, "function": func_str, "lower_bound": str(lower), "upper_bound": str(upper),
+                      "message": "Bounds must be numbers"}
+        else:
+            lower, upper = bounds
+            # Record quad's accuracy warnings instead of printing them
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                result = process_user_integration(str(func_str), lower, upper)
+            if caught:
+                result["warning"] = " ".join(str(caught[-1].message).split())
+            _drop_non_finite(result)
+
+    if "id" in job:
+        result["id"] = job["id"]
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def run_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run a chunk of (index, job) pairs in one worker.
+
+    Identical expressions are compiled only once per worker (parse_user_function
+    caches compiled kernels by normalized text), and repeated identical jobs
+    within the chunk are integrated once.
+
+    Args:
+        chunk: List of {"index": i, "job": job} items
+
+    Returns:
+        List of result dictionaries, each with its input index
+    """
+    results = []
+    seen = {}
+    for item in chunk:
+        job = item["job"]
+        key = (str(_first(job, FUNCTION_KEYS)), str(_first(job, LOWER_KEYS)), str(_first(job, UPPER_KEYS)))
+        if key in seen and "invalid" not in job:
+            start = time.perf_counter()
+            result = dict(seen[key])
+            result.pop("id", None)
+            if "id" in job:
+                result["id"] = job["id"]
+            result["elapsed"] = time.perf_counter() - start
+        else:
+            result = run_job(job)
+            seen[key] = result
+        results.append({"index": item["index"], **result})
+    return results
+
+
+def _chunks(jobs: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    indexed = ({"index": i, "job": job} for i, job in enumerate(jobs))
+    while True:
+        chunk = list(islice(indexed, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_jobs(jobs: Iterable[Dict[str, Any]], workers: Optional[int] = None, chunk_size: int = 64,
+             ordered: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Integrate jobs across a process pool, streaming results as they finish.
+
+    At most two chunks per worker are in flight (or buffered, when ordered), so
+    memory use does not grow with the number of jobs.
+
+    Args:
+        jobs: Iterable of job dictionaries (consumed lazily)
+        workers: Number of worker processes (None uses every CPU, 0 runs in-process)
+        chunk_size: Number of jobs sent to a worker at a time
+        ordered: Yield results in input order instead of completion order
+
+    Yields:
+        One result dictionary per job
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    chunks = _chunks(jobs, chunk_size)
+
+    if workers == 0:
+        for chunk in chunks:
+            yield from run_chunk(chunk)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        finished = {}
+        next_chunk = 0
+        submitted = 0
+        exhausted = False
+
+        while True:
+            while not exhausted and len(in_flight) + len(finished) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                in_flight[pool.submit(run_chunk, chunk)] = submitted
+                submitted += 1
+
+            if not in_flight and not finished:
+                return
+
+            if in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished[in_flight.pop(future)] = future.result()
+
+            if ordered:
+                while next_chunk in finished:
+                    yield from finished.pop(next_chunk)
+                    next_chunk += 1
+            else:
+                for number in list(finished):
+                    yield from finished.pop(number)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Integrate (function, lower, upper) jobs without the GUI.")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL or CSV job file, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="Where to write JSONL results (default stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Input format (default: from the file extension, else jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Jobs per worker task (default 64)")
+    parser.add_argument("--ordered", action="store_true", help="Write results in input order")
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failed = 0
+    try:
+        for result in run_jobs(read_jobs(source, fmt), args.workers, args.chunk_size, args.ordered):
+            try:
+                line = json.dumps(result, allow_nan=False)
+            except (TypeError, ValueError) as e:
+                # One unwritable result must not lose the rest of the run
+                result = {key: result[key] for key in ("index", "id") if key in result}
+                result.update(success=False, message=f"Result could not be written as JSON: {str(e)}")
+                line = json.dumps(result)
+            failed += not result["success"]
+            sink.write(line + "\n")
+            sink.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+Speed and accuracy benchmarks for the calculus engine and the graph pipeline.
+
+Times parse_user_function, integrate_function, cumulative_integral,
+integrate_parameter_sweep and each phase of a graph update (parse, sample,
+derivative, integral, symbolic, render) over a range of expression sizes,
+grid resolutions and sweep sizes. Numerical results are checked against
+the analytical integrals from integrate_common_functions. Runs headless
+(matplotlib's Agg backend).
+
+Usage:
+    python benchmark.py                          # print the report
+    python benchmark.py --save baseline.json     # record a baseline
+    python benchmark.py --compare baseline.json  # exit 1 on regressions
+"""
+import argparse
+import itertools
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import warnings
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from scipy.integrate import IntegrationWarning
+
+import expression
+import sampling
+import symbolic
+from integration import (cumulative_integral, get_integral_error, integrate_common_functions,
+                         integrate_function, integrate_parameter_sweep, parse_user_function)
+from pipeline import X_RANGE, numerical_derivative, symbolic_forms
+
+
+# Interval that avoids the singularities of every reference function (1/x, sqrt, tan)
+REFERENCE_BOUNDS = (0.25, 1.25)
+EXPRESSION_SIZES = (1, 4, 16, 64)
+GRID_RESOLUTIONS = (100, 1000, 10000)
+SWEEP_METHODS = ("adaptive", "fixed", "quad_vec")
+PHASE_FUNCTIONS = ("x^2 + 2x + 1", "x^2sin(x)", "tan(x)", "e^(-x^2)")
+# Each timing sample loops the call until it takes at least this long
+SAMPLE_SECONDS = 0.01
+TERMS = ("x^2", "sin(x)", "cos(2x)", "e^(-x^2)", "sqrt(x^2+1)", "x^3/7", "log(x^2+1)", "arctan(x)")
+
+
+def _clear_caches() -> None:
+    """Forget compiled kernels and symbolic results so timings are cold."""
+    expression.normalize_expression.cache_clear()
+    expression._compile_normalized.cache_clear()
+    symbolic.SYMBOLIC_CACHE.clear()
+
+
+class Timing(NamedTuple):
+    """Median seconds per call and the interquartile range of the samples relative to it."""
+    seconds: float
+    spread: float
+
+
+def _sample(func: Callable[[], Any], number: int, setup: Optional[Callable[[], Any]]) -> float:
+    """Total wall time of number calls of func(), leaving setup untimed."""
+    if setup is None:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+    total = 0.0
+    for _ in range(number):
+        setup()
+        start = time.perf_counter()
+        func()
+        total += time.perf_counter() - start
+    return total
+
+
+def time_call(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Timing:
+    """
+    Time func() per call as the median of repeat samples.
+
+    Like timeit's autorange, the number of calls per sample grows (1, 2, 5,
+    10, 20, ...) until a sample takes at least SAMPLE_SECONDS, so even
+    microsecond calls are measured well above the timer's resolution.
+
+    Args:
+        func: The code to time
+        repeat: Number of samples
+        setup: Optional untimed callable run before every call
+
+    Returns:
+        Timing with the median seconds per call and the relative spread
+    """
+    number = 1
+    for multiplier in itertools.cycle((2, 2.5, 2)):
+        if _sample(func, number, setup) >= SAMPLE_SECONDS:
+            break
+        number = int(number * multiplier)
+    per_call = [_sample(func, number, setup) / number for _ in range(repeat)]
+    median = statistics.median(per_call)
+    if len(per_call) < 2 or median <= 0:
+        return Timing(median, 0.0)
+    q1, _, q3 = statistics.quantiles(per_call, n=4)
+    return Timing(median, (q3 - q1) / median)
+
+
+def make_expression(size: int) -> str:
+    """Build an expression with size terms, cycling through TERMS."""
+    return " + ".join(f"{i % 3 + 1}{TERMS[i % len(TERMS)]}" for i in range(size))
+
+
+def _record(name: str, case: str, timing: Timing, work: float, unit: str,
+            abs_error: Optional[float] = None, gate: bool = True) -> Dict[str, Any]:
+    # gate=False marks single-shot timings that compare() should not flag
+    seconds = timing.seconds
+    return {
+        "name": name,
+        "case": case,
+        "seconds": seconds,
+        "spread": timing.spread,
+        "throughput": work / seconds if seconds > 0 else float("inf"),
+        "unit": unit,
+        "abs_error": abs_error,
+        "gate": gate,
+    }
+
+
+def bench_parse(repeat: int) -> List[Dict[str, Any]]:
+    """Cold and warm parse_user_function, plus evaluation throughput per expression size."""
+    records = []
+    grid = np.linspace(X_RANGE[0], X_RANGE[1], 1000)
+    for size in EXPRESSION_SIZES:
+        func_str = make_expression(size)
+        case = f"{size} terms"
+        cold = time_call(lambda: parse_user_function(func_str), repeat, setup=_clear_caches)
+        warm = time_call(lambda: parse_user_function(func_str), repeat)
+        records.append(_record("parse_user_function[cold]", case, cold, 1, "calls/s"))
+        records.append(_record("parse_user_function[warm]", case, warm, 1, "calls/s"))
+
+        func = parse_user_function(func_str)
+        vector = time_call(lambda: func(grid), repeat)
+        scalar = time_call(lambda: [func(v) for v in grid[:100]], repeat)
+        records.append(_record("evaluate[array]", case, vector, grid.size, "points/s"))
+        records.append(_record("evaluate[scalar]", case, scalar, 100, "points/s"))
+    return records
+
+
+def bench_integrate(repeat: int) -> List[Dict[str, Any]]:
+    """integrate_function on every reference function, with its error against the analytical integral."""
+    records = []
+    lower, upper = REFERENCE_BOUNDS
+    for func_str, reference in integrate_common_functions().items():
+        func = parse_user_function(func_str)
+        seconds = time_call(lambda: integrate_function(func, lower, upper), repeat)
+        error = get_integral_error(func, reference, lower, upper)
+        records.append(_record("integrate_function", func_str, seconds, 1, "integrals/s", float(error)))
+    return records
+
+
+def bench_cumulative(repeat: int) -> List[Dict[str, Any]]:
+    """cumulative_integral per grid resolution, with its worst error along the grid."""
+    records = []
+    lower, upper = REFERENCE_BOUNDS
+    for points in GRID_RESOLUTIONS:
+        grid = np.linspace(lower, upper, points)
+        for func_str, reference in integrate_common_functions().items():
+            func = parse_user_function(func_str)
+            seconds = time_call(lambda: cumulative_integral(func, grid), repeat)
+            values = cumulative_integral(func, grid)
+            error = np.max(np.abs(values - (reference(grid) - reference(lower))))
+            records.append(_record("cumulative_integral", f"{func_str} @ {points}", seconds, points,
+                                   "points/s", float(error)))
+    return records
+
+
+def bench_sweep(repeat: int) -> List[Dict[str, Any]]:
+    """integrate_parameter_sweep of a*sin(k*x) over [0, pi] per method and sweep size."""
+    records = []
+    for points in GRID_RESOLUTIONS:
+        ks = np.linspace(0.5, 5.0, points)
+        exact = 2 * (1 - np.cos(ks * np.pi)) / ks
+        for method in SWEEP_METHODS:
+            options = {"panels": 8} if method == "fixed" else {}
+            sweep = lambda: integrate_parameter_sweep("a*sin(k*x)", 0, np.pi, {"a": 2, "k": ks}, method, **options)
+            seconds = time_call(sweep, repeat)
+            error = np.max(np.abs(sweep()[0] - exact))
+            records.append(_record(f"integrate_parameter_sweep[{method}]", f"{points} values", seconds, points,
+                                   "integrals/s", float(error)))
+    return records
+
+
+def bench_phases(repeat: int) -> List[Dict[str, Any]]:
+    """Each phase of a graph update, as the pipeline and PlotPanel run them."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from rendering import PlotPanel
+
+    records = []
+    x_min, x_max = X_RANGE
+    for func_str in PHASE_FUNCTIONS:
+        parse = time_call(lambda: parse_user_function(func_str), repeat, setup=_clear_caches)
+        func = parse_user_function(func_str)
+
+        sample = time_call(lambda: sampling.adaptive_sample(func, x_min, x_max), repeat)
+        x_values, y_values = sampling.adaptive_sample(func, x_min, x_max)
+
+        derivative = time_call(
+            lambda: sampling.adaptive_sample(lambda x: numerical_derivative(func, x), x_min, x_max), repeat)
+
+        x_integral = x_values[np.isfinite(y_values)]
+        integral = time_call(lambda: cumulative_integral(func, x_integral, x_integral[0]), repeat)
+
+        # Symbolic work is slow; time it once, cold
+        _clear_caches()
+        start = time.perf_counter()
+        symbolic_forms(func_str)
+        symbolic_seconds = time.perf_counter() - start
+
+        figure = Figure(figsize=(3, 3), dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        panel = PlotPanel(figure.add_subplot(111), canvas, func_str, "f(x)", "#FFAB4C")
+        limits = (x_min, x_max, float(np.nanmin(y_values)), float(np.nanmax(y_values)) + 1)
+        panel.update(x_values, y_values, limits, f"${func_str}$")
+        render_full = time_call(lambda: canvas.draw(), repeat)
+        render_blit = time_call(panel.refresh, repeat)
+
+        records += [
+            _record("phase:parse", func_str, parse, 1, "calls/s"),
+            _record("phase:sample", func_str, sample, x_values.size, "points/s"),
+            _record("phase:derivative", func_str, derivative, x_values.size, "points/s"),
+            _record("phase:integral", func_str, integral, x_integral.size, "points/s"),
+            _record("phase:symbolic", func_str, Timing(symbolic_seconds, 0.0), 1, "calls/s", gate=False),
+            _record("phase:render[full]", func_str, render_full, 1, "frames/s"),
+            _record("phase:render[blit]", func_str, render_blit, 1, "frames/s"),
+        ]
+    return records
+
+
+def run_benchmarks(repeat: int = 7, include_phases: bool = True) -> Dict[str, Any]:
+    """
+    Run the whole suite.
+
+    Args:
+        repeat: Samples per timing (the median is kept)
+        include_phases: Also time the graph pipeline phases (needs sympy and matplotlib)
+
+    Returns:
+        Dictionary with environment metadata and a list of result records
+    """
+    records = bench_parse(repeat) + bench_integrate(repeat) + bench_cumulative(repeat) + bench_sweep(repeat)
+    if include_phases:
+        records += bench_phases(repeat)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "repeat": repeat,
+        "results": records,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], time_tolerance: float = 0.5,
+            error_tolerance: float = 10.0, error_floor: float = 1e-12,
+            noise_factor: float = 3.0) -> List[str]:
+    """
+    List regressions of current against baseline.
+
+    A timing regresses when it is slower per call by more than time_tolerance,
+    or by more than noise_factor times the measured spread of either run if
+    that is larger (both as fractions); single-shot timings are not checked.
+    An error regresses when it becomes infinite or NaN, or grows by more than
+    error_tolerance times and is above error_floor.
+
+    Args:
+        current: Output of run_benchmarks
+        baseline: A previously saved run_benchmarks output
+        time_tolerance: Allowed relative slowdown
+        noise_factor: Multiple of the relative spread that counts as noise
+        error_tolerance: Allowed error growth factor
+        error_floor: Errors below this are never regressions
+
+    Returns:
+        Human-readable regression messages (empty if none)
+    """
+    previous = {(r["name"], r["case"]): r for r in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        old = previous.get((record["name"], record["case"]))
+        if old is None:
+            continue
+        label = f"{record['name']} [{record['case']}]"
+        noise = noise_factor * max(record.get("spread", 0.0), old.get("spread", 0.0))
+        if record.get("gate", True) and record["seconds"] > old["seconds"] * (1 + max(time_tolerance, noise)):
+            regressions.append(f"{label}: {old['seconds'] * 1e6:.1f} us -> {record['seconds'] * 1e6:.1f} us per call")
+        new_error, old_error = record.get("abs_error"), old.get("abs_error")
+        if new_error is not None and old_error is not None:
+            if not math.isfinite(new_error):
+                if math.isfinite(old_error):
+                    regressions.append(f"{label}: error {old_error:.2e} -> {new_error}")
+            elif new_error > error_floor and new_error > max(old_error, error_floor) * error_tolerance:
+                regressions.append(f"{label}: error {old_error:.2e} -> {new_error:.2e}")
+    return regressions
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'benchmark':36s} {'case':22s} {'time/call':>13s} {'throughput':>22s} {'abs error':>10s}"]
+    for r in report["results"]:
+        error = "" if r["abs_error"] is None else f"{r['abs_error']:.2e}"
+        lines.append(f"{r['name']:36s} {r['case']:22s} {r['seconds'] * 1e6:10.1f} us "
+                     f"{r['throughput']:12.4g} {r['unit']:9s} {error:>10s}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark speed and accuracy of f'prime's calculus engine.")
+    parser.add_argument("--repeat", type=int, default=7, help="Samples per timing, median kept (default 7)")
+    parser.add_argument("--no-phases", action="store_true", help="Skip the graph pipeline phases")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed relative slowdown (default 0.5)")
+    parser.add_argument("--noise-factor", type=float, default=3.0,
+                        help="Ignore slowdowns within this many times the measured spread (default 3)")
+    args = parser.parse_args(argv)
+
+    # tan(x) crosses its poles in the phase runs; the error column already reports accuracy
+    warnings.simplefilter("ignore", IntegrationWarning)
+    report = run_benchmarks(args.repeat, include_phases=not args.no_phases)
+    print(format_report(report))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.time_tolerance, noise_factor=args.noise_factor)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+import ast
+import math
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+import numpy as np
+
+
+# Vectorized implementations used when evaluating a whole grid at once
+NUMPY_FUNCTIONS: Dict[str, Callable] = {
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'csc': lambda v: 1 / np.sin(v),
+    'sec': lambda v: 1 / np.cos(v),
+    'cot': lambda v: 1 / np.tan(v),
+    'arcsin': np.arcsin,
+    'arccos': np.arccos,
+    'arctan': np.arctan,
+    'asin': np.arcsin,
+    'acos': np.arccos,
+    'atan': np.arctan,
+    'sinh': np.sinh,
+    'cosh': np.cosh,
+    'tanh': np.tanh,
+    'exp': np.exp,
+    'log': np.log,
+    'ln': np.log,
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'Abs': np.abs,
+}
+
+# Scalar implementations used by the fast path (e.g. when called by quad)
+MATH_FUNCTIONS: Dict[str, Callable] = {
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'csc': lambda v: 1 / math.sin(v),
+    'sec': lambda v: 1 / math.cos(v),
+    'cot': lambda v: 1 / math.tan(v),
+    'arcsin': math.asin,
+    'arccos': math.acos,
+    'arctan': math.atan,
+    'asin': math.asin,
+    'acos': math.acos,
+    'atan': math.atan,
+    'sinh': math.sinh,
+    'cosh': math.cosh,
+    'tanh': math.tanh,
+    'exp': math.exp,
+    'log': math.log,
+    'ln': math.log,
+    'sqrt': math.sqrt,
+    'abs': abs,
+    'Abs': abs,
+}
+
+CONSTANTS: Dict[str, float] = {
+    'pi': math.pi,
+    'e': math.e,
+    'E': math.e,
+}
+
+VARIABLE = 'x'
+
+# Every identifier the user may type, longest first so that e.g. "sinh"
+# wins over "sin" and "exp" wins over "e" when splitting "xsinh(x)".
+KNOWN_NAMES: List[str] = sorted(
+    list(NUMPY_FUNCTIONS) + list(CONSTANTS) + [VARIABLE], key=len, reverse=True
+)
+
+ALLOWED_BINARY_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod)
+ALLOWED_UNARY_OPS = (ast.UAdd, ast.USub)
+
+# Numbers may use exponent notation ("2e3", "1e-3"); an "e" not followed by
+# digits is Euler's number, so "2e" and "2ex" still mean 2*e and 2*e*x
+_TOKEN_RE = re.compile(r'\s*(?:((?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)|([A-Za-z]+)|(\*\*|[-+*/%()]))')
+
+
+def _known_names(parameters: Tuple[str, ...] = ()) -> List[str]:
+    """
+    Return KNOWN_NAMES extended with parameter names, longest first.
+
+    Args:
+        parameters: Extra variable names such as ('a', 'k')
+
+    Returns:
+        List of names the tokenizer may split letter runs into
+
+    Raises:
+        ValueError: If a parameter is not a plain name or shadows a built-in name
+    """
+    if not parameters:
+        return KNOWN_NAMES
+    for name in parameters:
+        if not re.fullmatch(r'[A-Za-z]+', name):
+            raise ValueError(f"Invalid parameter name '{name}'")
+        if name in KNOWN_NAMES:
+            raise ValueError(f"Parameter name '{name}' is already used by a function, constant or x")
+    return sorted(KNOWN_NAMES + list(parameters), key=len, reverse=True)
+
+
+def _split_name(word: str, names: List[str] = KNOWN_NAMES) -> List[str]:
+    """
+    Split a run of letters into known names, e.g. "xsin" -> ["x", "sin"].
+
+    Args:
+        word: A run of letters from the user input
+        names: Names to split into, longest first
+
+    Returns:
+        List of known names that concatenate back to word
+    """
+    # choice[i] is the name starting at i that lets the rest of word split too
+    # (preferring longer names), filled from the end so long inputs need no recursion
+    choice = [None] * (len(word) + 1)
+    choice[len(word)] = ''
+    for start in range(len(word) - 1, -1, -1):
+        for name in names:
+            if word.startswith(name, start) and choice[start + len(name)] is not None:
+                choice[start] = name
+                break
+    if choice[0] is None:
+        raise ValueError(f"Unknown name '{word}'")
+
+    parts = []
+    pos = 0
+    while pos < len(word):
+        parts.append(choice[pos])
+        pos += len(choice[pos])
+    return parts
+
+
+def _tokenize(func_str: str, names: List[str] = KNOWN_NAMES) -> List[Tuple[str, str]]:
+    """
+    Break a user expression into (kind, text) tokens.
+
+    Args:
+        func_str: The expression with '^' already replaced by '**'
+        names: Names letter runs may be split into, longest first
+
+    Returns:
+        List of tokens where kind is one of 'number', 'name' or 'op'
+    """
+    tokens = []
+    pos = 0
+    func_str = func_str.rstrip()
+    while pos < len(func_str):
+        match = _TOKEN_RE.match(func_str, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Unexpected character '{func_str[pos:].strip()[:1]}'")
+        number, word, op = match.groups()
+        if number is not None:
+            tokens.append(('number', number))
+        elif word is not None:
+            tokens.extend(('name', name) for name in _split_name(word, names))
+        else:
+            tokens.append(('op', op))
+        pos = match.end()
+    return tokens
+
+
+@lru_cache(maxsize=256)
+def normalize_expression(func_str: str, parameters: Tuple[str, ...] = ()) -> str:
+    """
+    Convert user notation into a canonical Python expression.
+
+    Handles '^' for exponents, exponent notation such as "2e3", and implicit
+    multiplication such as "2x", "x2", "(x+1)x", "x(x+1)" and "2sin(x)".
+    Function names must be followed by '(' ("sin(x)", not "sinx").
+
+    Args:
+        func_str: String representation of the function
+        parameters: Extra variable names allowed besides x (e.g. ('a', 'k'))
+
+    Returns:
+        Normalized expression text, used as the compilation cache key
+
+    Raises:
+        ValueError: If the expression is empty, has unknown names, adjacent
+            numbers or a function name without '('
+    """
+    tokens = _tokenize(func_str.replace('^', '**'), _known_names(parameters))
+    if not tokens:
+        raise ValueError("Empty expression")
+
+    parts = []
+    previous = None
+    for kind, text in tokens:
+        if previous is not None:
+            prev_kind, prev_text = previous
+            if kind == 'number' and prev_kind == 'number':
+                raise ValueError(f"Missing operator between {prev_text} and {text}")
+            if prev_kind == 'name' and prev_text in NUMPY_FUNCTIONS and text != '(':
+                raise ValueError(f"{prev_text} must be followed by '('")
+            ends_operand = (prev_kind == 'number'
+                            or (prev_kind == 'name' and prev_text not in NUMPY_FUNCTIONS)
+                            or prev_text == ')')
+            starts_operand = kind == 'name' or text == '(' or kind == 'number'
+            if ends_operand and starts_operand:
+                parts.append('*')
+        parts.append(text)
+        previous = (kind, text)
+    if previous[0] == 'name' and previous[1] in NUMPY_FUNCTIONS:
+        raise ValueError(f"{previous[1]} must be followed by '('")
+
+    return ''.join(parts)
+
+
+class _Validator(ast.NodeTransformer):
+    """Reject anything outside the arithmetic whitelist and turn int literals into floats."""
+
+    def __init__(self, parameters: Tuple[str, ...] = ()):
+        super().__init__()
+        self.parameters = parameters
+
+    def visit_Expression(self, node):
+        return self.generic_visit(node)
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, ALLOWED_BINARY_OPS):
+            raise ValueError(f"Operator {type(node.op).__name__} is not allowed")
+        return self.generic_visit(node)
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, ALLOWED_UNARY_OPS):
+            raise ValueError(f"Operator {type(node.op).__name__} is not allowed")
+        return self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in NUMPY_FUNCTIONS:
+            raise ValueError("Only the supported math functions may be called")
+        if len(node.args) != 1 or node.keywords:
+            raise ValueError(f"{node.func.id}() takes exactly one argument")
+        node.args = [self.visit(node.args[0])]
+        return node
+
+    def visit_Name(self, node):
+        if node.id in NUMPY_FUNCTIONS:
+            raise ValueError(f"{node.id} must be called with an argument")
+        if node.id != VARIABLE and node.id not in CONSTANTS and node.id not in self.parameters:
+            raise ValueError(f"Unknown name '{node.id}'")
+        return node
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError("Only numeric literals are allowed")
+        # Floats keep constant sub-expressions like 9**9**9 from running forever
+        return ast.copy_location(ast.Constant(value=float(node.value)), node)
+
+    def generic_visit(self, node):
+        if not isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Load)
+                          + ALLOWED_BINARY_OPS + ALLOWED_UNARY_OPS):
+            raise ValueError(f"{type(node).__name__} is not allowed in an expression")
+        return super().generic_visit(node)
+
+
+class CompiledExpression:
+    """
+    A user expression compiled once into a code object.
+
+    Calling it with an array evaluates the whole array in a single NumPy pass;
+    calling it with a scalar uses the math module, which is much cheaper for
+    callers such as scipy.integrate.quad that evaluate one point at a time.
+
+    Expressions compiled with parameters (e.g. "a*sin(k*x)") take their values
+    as keyword arguments; arrays broadcast against x, so one call can evaluate
+    a whole parameter sweep.
+    """
+
+    def __init__(self, normalized: str, code, parameters: Tuple[str, ...] = ()):
+        self.normalized = normalized
+        self.parameters = parameters
+        self._code = code
+        self._numpy_namespace = {'__builtins__': {}, **NUMPY_FUNCTIONS, **CONSTANTS}
+        self._math_namespace = {'__builtins__': {}, **MATH_FUNCTIONS, **CONSTANTS}
+
+    def __call__(self, x: Union[float, np.ndarray], **params) -> Union[float, np.ndarray]:
+        if (isinstance(x, (np.ndarray, list, tuple)) and np.ndim(x) > 0
+                or any(np.ndim(value) > 0 for value in params.values())):
+            return self.evaluate(x, **params)
+        return self.scalar(x, **params)
+
+    def __repr__(self):
+        return f"CompiledExpression({self.normalized!r})"
+
+    def _variables(self, x, params: Dict[str, Any], convert: Callable) -> Dict[str, Any]:
+        """Build the local namespace for one evaluation, checking the parameters."""
+        missing = [name for name in self.parameters if name not in params]
+        if missing:
+            raise ValueError(f"Error evaluating function: missing value for {', '.join(missing)}")
+        unknown = [name for name in params if name not in self.parameters]
+        if unknown:
+            raise ValueError(f"Error evaluating function: unknown parameter {', '.join(unknown)}")
+        variables = {name: convert(value) for name, value in params.items()}
+        variables[VARIABLE] = convert(x)
+        return variables
+
+    def evaluate(self, x_values: np.ndarray, **params) -> np.ndarray:
+        """
+        Evaluate the expression over an array of x values in one call.
+
+        Args:
+            x_values: Array of x values
+            **params: Values of the expression's parameters (arrays broadcast against x_values)
+
+        Returns:
+            Float array with the broadcast shape of x_values and the parameters
+            (nan/inf where undefined)
+        """
+        variables = self._variables(x_values, params, lambda v: np.asarray(v, dtype=float))
+        shape = np.broadcast_shapes(*(v.shape for v in variables.values()))
+        try:
+            with np.errstate(all='ignore'):
+                result = eval(self._code, self._numpy_namespace, variables)
+        except Exception as e:
+            raise ValueError(f"Error evaluating function: {str(e)}")
+        result = np.asarray(result, dtype=float)
+        if result.shape != shape:
+            result = np.broadcast_to(result, shape).copy()
+        return result
+
+    def scalar(self, x: float, **params) -> float:
+        """
+        Evaluate the expression at a single point.
+
+        Args:
+            x: The point to evaluate at
+            **params: Scalar values of the expression's parameters
+
+        Returns:
+            The function value as a float (nan/inf where undefined)
+        """
+        variables = self._variables(x, params, float)
+        try:
+            return float(eval(self._code, self._math_namespace, variables))
+        except (ArithmeticError, ValueError, TypeError):
+            # Domain errors, division by zero or complex powers: let NumPy
+            # produce nan/inf like the vectorized path does
+            return float(self.evaluate(np.array([x]), **params)[0])
+
+
+@lru_cache(maxsize=256)
+def _compile_normalized(normalized: str, parameters: Tuple[str, ...] = ()) -> CompiledExpression:
+    """Parse, validate and compile a normalized expression (cached by its text and parameters)."""
+    try:
+        tree = ast.parse(normalized, mode='eval')
+    except SyntaxError:
+        raise ValueError("Invalid syntax")
+    tree = ast.fix_missing_locations(_Validator(parameters).visit(tree))
+    code = compile(tree, '<expression>', 'eval')
+    return CompiledExpression(normalized, code, parameters)
+
+
+def compile_expression(func_str: str, parameters: Tuple[str, ...] = ()) -> CompiledExpression:
+    """
+    Compile a user expression into a reusable vectorized function.
+
+    The expression is normalized, parsed into an AST, checked against a
+    whitelist of operations and compiled once. Compiled expressions are cached
+    by their normalized text, so "2x+1" and "2*x + 1" share one kernel.
+
+    Args:
+        func_str: String representation of the function (e.g. "x^2 + 2x + 1")
+        parameters: Extra variable names allowed besides x, e.g. ('a', 'k')
+            for "a*sin(k*x)"; their values are passed when calling
+
+    Returns:
+        A CompiledExpression callable on scalars or NumPy arrays
+
+    Raises:
+        ValueError: If the expression cannot be parsed or uses disallowed syntax
+    """
+    parameters = tuple(parameters)
+    return _compile_normalized(normalize_expression(func_str, parameters), parameters)
@@ -1,17 +1,41 @@
+import time
+STARTED = time.perf_counter()
+
+import argparse
 from pathlib import Path
 from tkinter import Tk, Canvas, Entry, Text, Button, PhotoImage, Frame, messagebox, filedialog
 import pyglet, os
 import subprocess
 from tkinter import font as tkFont
-import sympy as sp
-from scipy import integrate
-import numpy as np
-from integration import parse_user_function, process_user_integration
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from scheduler import ComputeScheduler
+from startup import StartupTimer, warm_up
 import datetime
-import re
+import math
+
+parser = argparse.ArgumentParser(description="f'prime calculus graphing app")
+parser.add_argument("--timings", action="store_true", help="Print import and startup timings on exit")
+parser.add_argument("--eager", action="store_true",
+                    help="Import everything and build the graphs before showing the window (for comparison)")
+parser.add_argument("--exit-after-startup", action="store_true",
+                    help="Close as soon as the first graphs are drawn (use with --timings)")
+options, _ = parser.parse_known_args()
+
+timer = StartupTimer(STARTED)
+timer.mark("core imports")
+
+# sympy and scipy are only imported by the worker processes (see the scheduler
+# below). matplotlib is needed here, but not before the window is up: it is
+# imported in the background while the widgets are built.
+PLOTTING_MODULES = ("numpy", "matplotlib.figure", "matplotlib.backends.backend_agg", "rendering")
+if options.eager:
+    with timer.measure("pipeline (sympy, scipy)"):
+        import pipeline
+    with timer.measure("matplotlib"):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from rendering import PlotPanel
+else:
+    warm_up(PLOTTING_MODULES, timer)
 
 # Get the directory where this script is located
 SCRIPT_DIR = Path(__file__).parent.absolute()
@@ -26,12 +50,26 @@ if font_path.exists():
 else:
     print(f"Warning: Font file not found at {font_path}")
 
+# Keep symbolic results across sessions so previously seen expressions are instant
+# (opened by each worker process)
+SYMBOLIC_CACHE_PATH = Path.home() / ".fprime" / "symbolic_cache.sqlite3"
+
 def relative_to_assets(path: str) -> Path:
     """Convert a relative path to an absolute path within the assets directory"""
     return ASSETS_DIR / path
 
 window = Tk()
 
+def on_window_shown(event):
+    """Build the graphs once the window has been mapped (and can paint first)"""
+    if event.widget is not window:
+        return
+    timer.mark("window shown")
+    if not options.eager:
+        window.after(1, create_graph_panels)
+
+window.bind("<Map>", on_window_shown)
+
 window.geometry("1440x1024")
 window.configure(bg = "#4268FB")
 window.title("f'prime")
@@ -237,419 +275,279 @@ graph_frame_2.place(relx=0.4, rely=0.572, anchor="nw")
 graph_frame_3 = Frame(window, bg="#4268FB", width=300, height=300)
 graph_frame_3.place(relx=0.682, rely=0.572, anchor="nw")
 
-# Create matplotlib figures for the graphs
-fig1 = Figure(figsize=(3, 3), dpi=100, facecolor="#3159EE")
-ax1 = fig1.add_subplot(111)
-ax1.set_facecolor("#3159EE")
-ax1.grid(True, linestyle='--', alpha=0.7, color='white')
-ax1.axhline(y=0, color='white', linestyle='-', alpha=0.3)
-ax1.axvline(x=0, color='white', linestyle='-', alpha=0.3)
-ax1.set_title('Original Function', fontsize=10, color='white')
-ax1.set_xlabel('x', fontsize=8, color='white')
-ax1.set_ylabel('f(x)', fontsize=8, color='white')
-ax1.tick_params(colors='white')
-ax1.spines['top'].set_color('white')
-ax1.spines['right'].set_color('white')
-ax1.spines['bottom'].set_color('white')
-ax1.spines['left'].set_color('white')
-
-fig2 = Figure(figsize=(3, 3), dpi=100, facecolor="#3159EE")
-ax2 = fig2.add_subplot(111)
-ax2.set_facecolor("#3159EE")
-ax2.grid(True, linestyle='--', alpha=0.7, color='white')
-ax2.axhline(y=0, color='white', linestyle='-', alpha=0.3)
-ax2.axvline(x=0, color='white', linestyle='-', alpha=0.3)
-ax2.set_title('First Derivative', fontsize=10, color='white')
-ax2.set_xlabel('x', fontsize=8, color='white')
-ax2.set_ylabel('f\'(x)', fontsize=8, color='white')
-ax2.tick_params(colors='white')
-ax2.spines['top'].set_color('white')
-ax2.spines['right'].set_color('white')
-ax2.spines['bottom'].set_color('white')
-ax2.spines['left'].set_color('white')
-
-fig3 = Figure(figsize=(3, 3), dpi=100, facecolor="#3159EE")
-ax3 = fig3.add_subplot(111)
-ax3.set_facecolor("#3159EE")
-ax3.grid(True, linestyle='--', alpha=0.7, color='white')
-ax3.axhline(y=0, color='white', linestyle='-', alpha=0.3)
-ax3.axvline(x=0, color='white', linestyle='-', alpha=0.3)
-ax3.set_title('Integral', fontsize=10, color='white')
-ax3.set_xlabel('x', fontsize=8, color='white')
-ax3.set_ylabel('∫f(x)dx', fontsize=8, color='white')
-ax3.tick_params(colors='white')
-ax3.spines['top'].set_color('white')
-ax3.spines['right'].set_color('white')
-ax3.spines['bottom'].set_color('white')
-ax3.spines['left'].set_color('white')
-
-# Create canvas widgets for the graphs
-canvas1 = FigureCanvasTkAgg(fig1, master=graph_frame_1)
-canvas1.draw()
-canvas1.get_tk_widget().pack(fill='both', expand=True)
-
-canvas2 = FigureCanvasTkAgg(fig2, master=graph_frame_2)
-canvas2.draw()
-canvas2.get_tk_widget().pack(fill='both', expand=True)
-
-canvas3 = FigureCanvasTkAgg(fig3, master=graph_frame_3)
-canvas3.draw()
-canvas3.get_tk_widget().pack(fill='both', expand=True)
-
-# Function to compute numerical derivative
-def numerical_derivative(func, x, h=0.0001):
-    """Compute derivative using central difference method"""
-    return (func(x + h) - func(x - h)) / (2 * h)
+# The graph panels are created once the window is on screen (see create_graph_panels)
+panel1 = panel2 = panel3 = None
+
+def create_graph_panels():
+    """Build the three matplotlib figures and their canvases"""
+    global panel1, panel2, panel3
+    if panel1 is not None:
+        return
+    with timer.measure("matplotlib"):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from rendering import PlotPanel
+    
+    # Create matplotlib figures for the graphs
+    fig1 = Figure(figsize=(3, 3), dpi=100, facecolor="#3159EE")
+    ax1 = fig1.add_subplot(111)
+    
+    fig2 = Figure(figsize=(3, 3), dpi=100, facecolor="#3159EE")
+    ax2 = fig2.add_subplot(111)
+    
+    fig3 = Figure(figsize=(3, 3), dpi=100, facecolor="#3159EE")
+    ax3 = fig3.add_subplot(111)
+    
+    # Create canvas widgets for the graphs
+    canvas1 = FigureCanvasTkAgg(fig1, master=graph_frame_1)
+    canvas2 = FigureCanvasTkAgg(fig2, master=graph_frame_2)
+    canvas3 = FigureCanvasTkAgg(fig3, master=graph_frame_3)
+    
+    # Styled once; later updates move the existing artists and blit
+    panel1 = PlotPanel(ax1, canvas1, 'Original Function', 'f(x)', '#FFAB4C')
+    panel2 = PlotPanel(ax2, canvas2, 'First Derivative', 'f\'(x)', '#69F5FF')
+    panel3 = PlotPanel(ax3, canvas3, 'Integral', '∫f(x)dx', '#69FF8A')
+    
+    for graph_canvas in (canvas1, canvas2, canvas3):
+        graph_canvas.draw()
+        graph_canvas.get_tk_widget().pack(fill='both', expand=True)
+    timer.mark("graph panels ready")
+    
+    # Results that arrived in the meantime
+    try:
+        render_results()
+    except Exception as e:
+        print(f"Error updating graphs: {str(e)}")
+
+# Numeric and symbolic work runs in worker processes so the window never freezes.
+# Tasks are named as "module:function" so that only the workers import sympy
+# and scipy; they preload the pipeline as soon as they start.
+NUMERIC_TIME_BUDGET = 10  # seconds
+SYMBOLIC_TIME_BUDGET = 30  # seconds
+NUMERIC_CURVES = "pipeline:numeric_curves"
+SYMBOLIC_FORMS = "pipeline:symbolic_forms"
+DEFINITE_INTEGRAL = "pipeline:definite_integral"
+EXACT_INTEGRAL = "pipeline:exact_integral"
+scheduler = ComputeScheduler(window, initializer="symbolic:configure_cache", initargs=(None, SYMBOLIC_CACHE_PATH),
+                             preload=("pipeline",))
+scheduler.start()
+timer.mark("workers started")
+
+# Latest results for the function currently shown; symbolic ones arrive later,
+# and the exact definite integral only when the numerical area failed
+current_results = {"function": None, "numeric": None, "symbolic": None, "exact": None}
+
+def has_area(numeric):
+    """True if the numerical definite integral is known and finite"""
+    return numeric is not None and numeric["definite_integral"] is not None \
+        and math.isfinite(numeric["definite_integral"])
+
+def get_integration_bounds():
+    """Return (lower, upper) from the limit entries, or None if they are not valid numbers"""
+    try:
+        return (float(entry_4.get()), float(entry_5.get()))
+    except (ValueError, NameError):
+        return None
+
+def render_results():
+    """Draw whatever results have arrived for the current function"""
+    func_str = current_results["function"]
+    numeric = current_results["numeric"]
+    sym = current_results["symbolic"]
+    
+    # Update the text fields once the symbolic forms are known
+    if sym is not None:
+        entry_2.delete("1.0", "end")
+        entry_2.insert("1.0", f"d/dx({func_str}) = {sym['derivative']}")
+        entry_2.config(fg=TEXT_COLOR)
+        
+        entry_3.delete("1.0", "end")
+        entry_3.insert("1.0", f"∫({func_str})dx = {sym['integral']} + C")
+        bounds = sym["integration_bounds"]
+        exact = current_results["exact"]
+        if bounds:
+            if has_area(numeric):
+                entry_3.insert("end", f"\n∫({func_str})dx from {bounds[0]} to {bounds[1]} = {numeric['definite_integral']:.6f}")
+            elif exact is not None and exact["integration_bounds"] == bounds:
+                entry_3.insert("end", f"\n∫({func_str})dx from {bounds[0]} to {bounds[1]} = {exact['exact_integral']}")
+        entry_3.config(fg=TEXT_COLOR)
+    
+    if numeric is None or panel1 is None:
+        return
+    
+    bounds = numeric["integration_bounds"]
+    area = numeric["definite_integral"]
+    
+    # Numerical curves first, replaced by analytic ones when available
+    x_prime, y_prime = numeric["x_prime"], numeric["y_prime"]
+    x_integral, y_integral = numeric["x_integral"], numeric["y_integral"]
+    derivative_limits = numeric["derivative_limits"]
+    integral_limits = numeric["integral_limits"]
+    plain_function = "f(x) = " + func_str.replace("$", "\\$")
+    if sym is not None:
+        from rendering import mathtext_label
+        # sympy LaTeX that mathtext cannot render falls back to the display strings
+        function_label = mathtext_label(f'$f(x) = {sym["function_latex"]}$', plain_function)
+        derivative_label = mathtext_label(f'$f\'(x) = {sym["derivative_latex"]}$', f"f'(x) = {sym['derivative']}")
+        integral_label = mathtext_label(f'$\\int f(x)dx = {sym["integral_latex"]}$', f"∫f(x)dx = {sym['integral']}")
+        if sym["y_prime"] is not None:
+            x_prime, y_prime, derivative_limits = sym["x_prime"], sym["y_prime"], sym["derivative_limits"]
+        if sym["y_integral"] is not None:
+            x_integral, y_integral, integral_limits = sym["x_integral"], sym["y_integral"], sym["integral_limits"]
+    else:
+        # Plain text (no mathtext) until the LaTeX is ready: raw input such as
+        # e^x^2 or x%2 is not valid mathtext
+        function_label = plain_function
+        derivative_label = "f'(x)"
+        integral_label = "∫f(x)dx"
+    
+    # Only panels whose curve, limits or annotations changed are redrawn
+    panel1.update(numeric["x_values"], numeric["y_values"], numeric["function_limits"],
+                  function_label, bounds, area)
+    panel2.update(x_prime, y_prime, derivative_limits, derivative_label)
+    panel3.update(x_integral, y_integral, integral_limits, integral_label, bounds, area)
+    timer.mark("first graphs drawn")
+    if sym is not None:
+        timer.mark("first symbolic forms shown")
+    if options.exit_after_startup:
+        options.exit_after_startup = False
+        window.after_idle(on_close)
+
+def on_numeric_result(result):
+    if result["function"] != current_results["function"]:
+        return
+    current_results["numeric"] = result
+    
+    # The limits may have been edited while the curves were computing
+    integration_bounds = get_integration_bounds()
+    bounds_changed = integration_bounds != result["integration_bounds"]
+    if bounds_changed:
+        result["integration_bounds"] = integration_bounds
+        result["definite_integral"] = None
+    if current_results["symbolic"] is not None:
+        current_results["symbolic"]["integration_bounds"] = integration_bounds
+    
+    try:
+        render_results()
+    except Exception as e:
+        print(f"Error updating graphs: {str(e)}")
+    if bounds_changed:
+        request_area(integration_bounds)
+    elif integration_bounds and not has_area(result):
+        request_exact_integral(integration_bounds)
+
+def request_exact_integral(integration_bounds):
+    """Ask sympy for the exact definite integral when the numerical one failed"""
+    scheduler.submit(EXACT_INTEGRAL, current_results["function"], integration_bounds,
+                     on_result=on_exact_result, timeout=SYMBOLIC_TIME_BUDGET, group="exact")
+
+def on_exact_result(result):
+    numeric = current_results["numeric"]
+    if numeric is None or result["function"] != current_results["function"] \
+            or result["integration_bounds"] != numeric["integration_bounds"]:
+        return
+    current_results["exact"] = result
+    render_results()
+
+def on_numeric_error(error):
+    print(f"Error updating graphs: {str(error)}")
+
+def on_symbolic_result(result):
+    if result["function"] != current_results["function"]:
+        return
+    current_results["symbolic"] = result
+    if current_results["numeric"] is not None:
+        result["integration_bounds"] = current_results["numeric"]["integration_bounds"]
+    try:
+        render_results()
+    except Exception as e:
+        print(f"Error updating graphs: {str(e)}")
+
+def on_symbolic_error(error):
+    """Show the error and fall back to the numerical definite integral"""
+    entry_2.delete("1.0", "end")
+    entry_2.insert("1.0", f"Error: {str(error)}")
+    entry_2.config(fg=TEXT_COLOR)
+    
+    numeric = current_results["numeric"]
+    entry_3.delete("1.0", "end")
+    if numeric is not None and numeric["definite_integral"] is not None:
+        entry_3.insert("1.0", f"Numerical result: {numeric['definite_integral']:.6f}")
+    elif get_integration_bounds() is None:
+        entry_3.insert("1.0", "Please enter valid limits")
+    else:
+        entry_3.insert("1.0", f"Error: {str(error)}")
+    entry_3.config(fg=TEXT_COLOR)
 
 # Function to update the graphs
 def update_graphs(func_str=None):
+    """Schedule the numeric curves and the symbolic forms for func_str, dropping stale jobs"""
     # Default function if none provided
     if func_str is None or func_str == "" or func_str == "Enter your function here":
         func_str = "x^2 + 2x + 1"
     
-    try:
-        # Parse the function using our enhanced parser
-        func = parse_user_function(func_str)
-        
-        # Initialize bounds
-        x_min, x_max = -5, 5  # Fixed graph range
-        integration_bounds = None
-        
-        # Get the lower and upper limits
-        try:
-            lower_limit = float(entry_4.get())
-            upper_limit = float(entry_5.get())
-            integration_bounds = (lower_limit, upper_limit)
-        except:
-            pass
-        
-        # Create x values for the full graph range
-        x_values = np.linspace(x_min, x_max, 1000)
-        
-        # Compute function values
-        y_values = [func(x_val) for x_val in x_values]
-        
-        # Calculate y-axis bounds based on function values
-        y_min = min(y_values) - 1
-        y_max = max(y_values) + 1
-        
-        # Get the derivative expression from the text field
-        derivative_text = entry_2.get("1.0", "end-1c")
-        derivative_expr = None
-        
-        # Extract the derivative expression from the text
-        if "d/dx" in derivative_text and "=" in derivative_text:
-            derivative_expr = derivative_text.split("=")[1].strip()
-            try:
-                # Parse the derivative expression
-                derivative_func = parse_user_function(derivative_expr)
-                # Compute derivative values
-                y_prime = [derivative_func(x_val) for x_val in x_values]
-            except:
-                # Fallback to numerical derivative if parsing fails
-                y_prime = np.array([numerical_derivative(func, xi) for xi in x_values])
-        else:
-            # Fallback to numerical derivative if text doesn't contain derivative
-            y_prime = np.array([numerical_derivative(func, xi) for xi in x_values])
-        
-        # Calculate y-axis bounds for derivative
-        y_prime_min = min(y_prime) - 1
-        y_prime_max = max(y_prime) + 1
-        
-        # Get the integral expression from the text field
-        integral_text = entry_3.get("1.0", "end-1c")
-        integral_expr = None
-        
-        # Extract the integral expression from the text
-        if "∫" in integral_text and "dx" in integral_text and "=" in integral_text:
-            # Get the first line which contains the indefinite integral
-            first_line = integral_text.split("\n")[0]
-            integral_expr = first_line.split("=")[1].strip()
-            # Remove "+ C" if present
-            if "+ C" in integral_expr:
-                integral_expr = integral_expr.replace("+ C", "").strip()
-            
-            try:
-                # Parse the integral expression
-                integral_func = parse_user_function(integral_expr)
-                # Compute integral values
-                y_integral = [integral_func(x_val) for x_val in x_values]
-            except:
-                # Fallback to numerical integration if parsing fails
-                y_integral = np.zeros_like(x_values)
-                for i in range(1, len(x_values)):
-                    y_integral[i], _ = integrate.quad(func, x_min, x_values[i])
-        else:
-            # Fallback to numerical integration if text doesn't contain integral
-            y_integral = np.zeros_like(x_values)
-            for i in range(1, len(x_values)):
-                y_integral[i], _ = integrate.quad(func, x_min, x_values[i])
-        
-        # Calculate y-axis bounds for integral
-        y_integral_min = min(y_integral) - 1
-        y_integral_max = max(y_integral) + 1
-        
-        # Convert expressions to LaTeX format for display using sympy
-        try:
-            x = sp.Symbol('x')
-            # Convert the function string to sympy format for LaTeX
-            sympy_str = func_str.replace('^', '**')
-            sympy_str = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', sympy_str)
-            sympy_str = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', sympy_str)
-            sympy_str = re.sub(r'\)([a-zA-Z])', r')*\1', sympy_str)
-            sympy_str = re.sub(r'([a-zA-Z])\(', r'\1*(', sympy_str)
-            
-            # Handle exponential function
-            sympy_str = re.sub(r'e\^\((.*?)\)', r'exp(\1)', sympy_str)
-            sympy_str = re.sub(r'e\^(.*?)(?=[+\-*/) ]|$)', r'exp(\1)', sympy_str)
-            
-            expr = sp.sympify(sympy_str)
-            original_latex = sp.latex(expr)
-            
-            # Get derivative and integral LaTeX
-            derivative_expr = sp.diff(expr, x)
-            integral_expr = sp.integrate(expr, x)
-            
-            # Simplify the expressions
-            derivative_expr = sp.simplify(derivative_expr)
-            integral_expr = sp.simplify(integral_expr)
-            
-            # Handle piecewise integrals
-            if isinstance(integral_expr, sp.Piecewise):
-                # Extract the main case from the piecewise
-                main_case = integral_expr.args[0][0]
-                # Simplify the main case
-                main_case = sp.simplify(main_case)
-                # Replace the piecewise with the simplified main case
-                integral_expr = main_case
-            
-            # Handle exponential integrals specially
-            if 'exp' in str(integral_expr):
-                # For e^(kx), the integral is (1/k)e^(kx)
-                integral_expr = sp.simplify(integral_expr)
-            
-            derivative_latex = sp.latex(derivative_expr)
-            integral_latex = sp.latex(integral_expr)
-            
-            # Convert LaTeX to more readable format
-            derivative_str = str(derivative_expr)
-            integral_str = str(integral_expr)
-            
-            # Clean up the expressions
-            derivative_str = derivative_str.replace('**', '^')
-            derivative_str = derivative_str.replace('*', '')
-            derivative_str = derivative_str.replace('exp', 'e^')
-            derivative_str = derivative_str.replace('log(e)', '1')  # Simplify log(e) terms
-            
-            integral_str = integral_str.replace('**', '^')
-            integral_str = integral_str.replace('*', '')
-            integral_str = integral_str.replace('exp', 'e^')
-            integral_str = integral_str.replace('log(e)', '1')  # Simplify log(e) terms
-            
-            # Update the derivative text field
-            entry_2.delete("1.0", "end")
-            entry_2.insert("1.0", f"d/dx({func_str}) = {derivative_str}")
-            
-            # Update the integral text field
-            entry_3.delete("1.0", "end")
-            entry_3.insert("1.0", f"∫({func_str})dx = {integral_str} + C")
-            
-            # Calculate definite integral if bounds are specified
-            if integration_bounds:
-                try:
-                    definite_integral, _ = integrate.quad(func, integration_bounds[0], integration_bounds[1])
-                    entry_3.insert("end", f"\n∫({func_str})dx from {integration_bounds[0]} to {integration_bounds[1]} = {definite_integral:.6f}")
-                except:
-                    pass
-        except:
-            # Fallback to simple text if LaTeX conversion fails
-            original_latex = func_str
-            derivative_latex = "f'(x)"
-            integral_latex = "∫f(x)dx"
-        
-        # Calculate optimal x-range for original function
-        y_values = np.array(y_values)
-        y_range = max(y_values) - min(y_values)
-        if y_range < 10:  # For functions with small range
-            x_min_f, x_max_f = -5, 5
-        else:  # For functions with larger range, find interesting region
-            interesting_points = np.where(abs(y_values) <= max(abs(y_values)) * 2)[0]
-            if len(interesting_points) > 0:
-                x_min_f = max(-10, x_values[interesting_points[0]] - 1)
-                x_max_f = min(10, x_values[interesting_points[-1]] + 1)
-            else:
-                x_min_f, x_max_f = -5, 5
-
-        # Calculate optimal y-range for original function
-        y_min_f = min(y_values) - y_range * 0.1
-        y_max_f = max(y_values) + y_range * 0.1
-
-        # Calculate derivative values and its optimal ranges
-        if "d/dx" in derivative_text and "=" in derivative_text:
-            derivative_expr = derivative_text.split("=")[1].strip()
-            try:
-                derivative_func = parse_user_function(derivative_expr)
-                y_prime = [derivative_func(x_val) for x_val in x_values]
-            except:
-                y_prime = np.array([numerical_derivative(func, xi) for xi in x_values])
-        else:
-            y_prime = np.array([numerical_derivative(func, xi) for xi in x_values])
-
-        # Calculate optimal ranges for derivative
-        y_prime = np.array(y_prime)
-        y_prime_range = max(y_prime) - min(y_prime)
-        y_prime_min = min(y_prime) - y_prime_range * 0.1
-        y_prime_max = max(y_prime) + y_prime_range * 0.1
-
-        # Find interesting region for derivative
-        if y_prime_range < 10:
-            x_min_d, x_max_d = -5, 5
-        else:
-            interesting_points = np.where(abs(y_prime) <= max(abs(y_prime)) * 2)[0]
-            if len(interesting_points) > 0:
-                x_min_d = max(-10, x_values[interesting_points[0]] - 1)
-                x_max_d = min(10, x_values[interesting_points[-1]] + 1)
-            else:
-                x_min_d, x_max_d = -5, 5
-
-        # Calculate integral values and its optimal ranges
-        try:
-            if integral_expr:
-                integral_func = parse_user_function(integral_expr)
-                y_integral = [integral_func(x_val) for x_val in x_values]
-            else:
-                y_integral = np.zeros_like(x_values)
-                for i in range(1, len(x_values)):
-                    y_integral[i], _ = integrate.quad(func, x_min, x_values[i])
-        except:
-            y_integral = np.zeros_like(x_values)
-            for i in range(1, len(x_values)):
-                y_integral[i], _ = integrate.quad(func, x_min, x_values[i])
-
-        # Calculate optimal ranges for integral
-        y_integral = np.array(y_integral)
-        y_integral_range = max(y_integral) - min(y_integral)
-        y_integral_min = min(y_integral) - y_integral_range * 0.1
-        y_integral_max = max(y_integral) + y_integral_range * 0.1
-
-        # Find interesting region for integral
-        if y_integral_range < 10:
-            x_min_i, x_max_i = -5, 5
-        else:
-            interesting_points = np.where(abs(y_integral) <= max(abs(y_integral)) * 2)[0]
-            if len(interesting_points) > 0:
-                x_min_i = max(-10, x_values[interesting_points[0]] - 1)
-                x_max_i = min(10, x_values[interesting_points[-1]] + 1)
-            else:
-                x_min_i, x_max_i = -5, 5
-
-        # Update the graphs
-        # Original function
-        ax1.clear()
-        ax1.set_facecolor("#3159EE")
-        ax1.grid(True, linestyle='--', alpha=0.7, color='white')
-        ax1.axhline(y=0, color='white', linestyle='-', alpha=0.3)
-        ax1.axvline(x=0, color='white', linestyle='-', alpha=0.3)
-        ax1.set_title('Original Function', fontsize=10, color='white')
-        ax1.set_xlabel('x', fontsize=8, color='white')
-        ax1.set_ylabel('f(x)', fontsize=8, color='white')
-        ax1.tick_params(colors='white')
-        ax1.spines['top'].set_color('white')
-        ax1.spines['right'].set_color('white')
-        ax1.spines['bottom'].set_color('white')
-        ax1.spines['left'].set_color('white')
-        
-        # Set adaptive ranges for original function
-        ax1.set_xlim(x_min_f, x_max_f)
-        ax1.set_ylim(y_min_f, y_max_f)
-        
-        # Plot the function
-        ax1.plot(x_values, y_values, color='#FFAB4C', linewidth=2)
-        
-        # If we have valid integration bounds, add vertical lines
-        if integration_bounds:
-            ax1.axvline(x=integration_bounds[0], color='white', linestyle='--', alpha=0.8)
-            ax1.axvline(x=integration_bounds[1], color='white', linestyle='--', alpha=0.8)
-            if definite_integral is not None:
-                ax1.text(0.05, 0.05, f'Area = {definite_integral:.4f}', 
-                         transform=ax1.transAxes, fontsize=9, color='white',
-                         verticalalignment='bottom', bbox=dict(facecolor='#3159EE', alpha=0.7, edgecolor='white'))
-        
-        # Add function expression as text
-        ax1.text(0.05, 0.95, f'$f(x) = {original_latex}$', 
-                 transform=ax1.transAxes, fontsize=9, color='white',
-                 verticalalignment='top', bbox=dict(facecolor='#3159EE', alpha=0.7, edgecolor='white'))
-        
-        canvas1.draw()
-        
-        # Derivative
-        ax2.clear()
-        ax2.set_facecolor("#3159EE")
-        ax2.grid(True, linestyle='--', alpha=0.7, color='white')
-        ax2.axhline(y=0, color='white', linestyle='-', alpha=0.3)
-        ax2.axvline(x=0, color='white', linestyle='-', alpha=0.3)
-        ax2.set_title('First Derivative', fontsize=10, color='white')
-        ax2.set_xlabel('x', fontsize=8, color='white')
-        ax2.set_ylabel('f\'(x)', fontsize=8, color='white')
-        ax2.tick_params(colors='white')
-        ax2.spines['top'].set_color('white')
-        ax2.spines['right'].set_color('white')
-        ax2.spines['bottom'].set_color('white')
-        ax2.spines['left'].set_color('white')
-        
-        # Set adaptive ranges for derivative
-        ax2.set_xlim(x_min_d, x_max_d)
-        ax2.set_ylim(y_prime_min, y_prime_max)
-        
-        ax2.plot(x_values, y_prime, color='#69F5FF', linewidth=2)
-        
-        # Add derivative expression as text
-        ax2.text(0.05, 0.95, f'$f\'(x) = {derivative_latex}$', 
-                 transform=ax2.transAxes, fontsize=9, color='white',
-                 verticalalignment='top', bbox=dict(facecolor='#3159EE', alpha=0.7, edgecolor='white'))
-        
-        canvas2.draw()
-        
-        # Integral
-        ax3.clear()
-        ax3.set_facecolor("#3159EE")
-        ax3.grid(True, linestyle='--', alpha=0.7, color='white')
-        ax3.axhline(y=0, color='white', linestyle='-', alpha=0.3)
-        ax3.axvline(x=0, color='white', linestyle='-', alpha=0.3)
-        ax3.set_title('Integral', fontsize=10, color='white')
-        ax3.set_xlabel('x', fontsize=8, color='white')
-        ax3.set_ylabel('∫f(x)dx', fontsize=8, color='white')
-        ax3.tick_params(colors='white')
-        ax3.spines['top'].set_color('white')
-        ax3.spines['right'].set_color('white')
-        ax3.spines['bottom'].set_color('white')
-        ax3.spines['left'].set_color('white')
-        
-        # Set adaptive ranges for integral
-        ax3.set_xlim(x_min_i, x_max_i)
-        ax3.set_ylim(y_integral_min, y_integral_max)
-        
-        # Plot the integral curve
-        ax3.plot(x_values, y_integral, color='#69FF8A', linewidth=2)
-        
-        # If we have valid integration bounds, add vertical lines
-        if integration_bounds:
-            ax3.axvline(x=integration_bounds[0], color='white', linestyle='--', alpha=0.8)
-            ax3.axvline(x=integration_bounds[1], color='white', linestyle='--', alpha=0.8)
-            if definite_integral is not None:
-                ax3.text(0.05, 0.05, f'Area = {definite_integral:.4f}', 
-                         transform=ax3.transAxes, fontsize=9, color='white',
-                         verticalalignment='bottom', bbox=dict(facecolor='#3159EE', alpha=0.7, edgecolor='white'))
-        
-        # Add integral expression as text
-        ax3.text(0.05, 0.95, f'$\\int f(x)dx = {integral_latex}$', 
-                 transform=ax3.transAxes, fontsize=9, color='white',
-                 verticalalignment='top', bbox=dict(facecolor='#3159EE', alpha=0.7, edgecolor='white'))
-        
-        canvas3.draw()
-        
-    except Exception as e:
-        print(f"Error updating graphs: {str(e)}")
+    integration_bounds = get_integration_bounds()
+    
+    # Stale numeric jobs are cheap, so they finish and their results are
+    # ignored; only stale sympy jobs are worth restarting a worker for
+    scheduler.cancel("numeric", running=False)
+    scheduler.cancel("bounds", running=False)
+    scheduler.cancel("symbolic")
+    scheduler.cancel("exact")
+    current_results.update(function=func_str, numeric=None, symbolic=None, exact=None)
+    
+    # Numeric curves are cheap and are drawn first; symbolic forms follow
+    scheduler.submit(NUMERIC_CURVES, func_str, integration_bounds,
+                     on_result=on_numeric_result, on_error=on_numeric_error,
+                     timeout=NUMERIC_TIME_BUDGET, group="numeric")
+    scheduler.submit(SYMBOLIC_FORMS, func_str, integration_bounds,
+                     on_result=on_symbolic_result, on_error=on_symbolic_error,
+                     timeout=SYMBOLIC_TIME_BUDGET, group="symbolic")
+
+def on_function_edited(event):
+    """Drop queued work and stop sympy for a function the user is no longer looking at"""
+    if entry_1.get() != current_results["function"]:
+        scheduler.cancel("numeric", running=False)
+        scheduler.cancel("symbolic")
+
+def on_area_result(result):
+    numeric = current_results["numeric"]
+    if numeric is None or result["function"] != current_results["function"] \
+            or result["integration_bounds"] != numeric["integration_bounds"]:
+        return
+    numeric["definite_integral"] = result["definite_integral"]
+    render_results()
+    if not has_area(numeric):
+        request_exact_integral(result["integration_bounds"])
+
+def on_area_error(error):
+    numeric = current_results["numeric"]
+    if numeric is not None and numeric["integration_bounds"]:
+        request_exact_integral(numeric["integration_bounds"])
+
+def request_area(integration_bounds):
+    """Recompute only the numerical area for new limits (None just cancels)"""
+    scheduler.cancel("bounds", running=False)
+    scheduler.cancel("exact")
+    if integration_bounds:
+        scheduler.submit(DEFINITE_INTEGRAL, current_results["function"], integration_bounds,
+                         on_result=on_area_result, on_error=on_area_error,
+                         timeout=NUMERIC_TIME_BUDGET, group="bounds")
+
+def on_bounds_edited(event):
+    """Move the bound markers right away and recompute only the area"""
+    numeric = current_results["numeric"]
+    integration_bounds = get_integration_bounds()
+    if numeric is None or integration_bounds == numeric["integration_bounds"]:
+        return
+    
+    numeric["integration_bounds"] = integration_bounds
+    numeric["definite_integral"] = None
+    current_results["exact"] = None
+    if current_results["symbolic"] is not None:
+        current_results["symbolic"]["integration_bounds"] = integration_bounds
+    render_results()
+    request_area(integration_bounds)
 
 # Initialize graphs with sample function
 update_graphs("x^2 + 2x + 1")
@@ -813,124 +711,19 @@ image_21 = canvas.create_image(
     image=image_image_21
 )
 
-# Function to calculate the first derivative
-def calculate_derivative():
-    # Get the function from the input field
-    func_str = entry_1.get()
-    
-    # Check if the function is empty or still has the placeholder
-    if func_str == "" or func_str == "Enter your function here":
-        entry_2.delete("1.0", "end")
-        entry_2.insert("1.0", "Please enter a function")
-        entry_2.config(fg=TEXT_COLOR)  # Set text color
-        return
-    
-    try:
-        # Parse the function using our enhanced parser
-        func = parse_user_function(func_str)
-        
-        # Convert the function string to sympy format for derivative calculation
-        x = sp.Symbol('x')
-        sympy_str = func_str.replace('^', '**')
-        sympy_str = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', sympy_str)
-        sympy_str = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', sympy_str)
-        sympy_str = re.sub(r'\)([a-zA-Z])', r')*\1', sympy_str)
-        sympy_str = re.sub(r'([a-zA-Z])\(', r'\1*(', sympy_str)
-        expr = sp.sympify(sympy_str)
-        
-        # Calculate the first derivative
-        derivative = sp.diff(expr, x)
-        
-        # Convert the derivative to a more natural format
-        derivative_str = str(derivative)
-        derivative_str = derivative_str.replace('**', '^')
-        derivative_str = derivative_str.replace('*', '')
-        
-        # Display the result
-        entry_2.delete("1.0", "end")
-        entry_2.insert("1.0", f"d/dx({func_str}) = {derivative_str}")
-        entry_2.config(fg=TEXT_COLOR)  # Set text color
-        
-    except Exception as e:
-        # If parsing fails, display error
-        entry_2.delete("1.0", "end")
-        entry_2.insert("1.0", f"Error: {str(e)}")
-        entry_2.config(fg=TEXT_COLOR)  # Set text color
-
-# Function to calculate the integral
-def calculate_integral():
-    # Get the function from the input field
-    func_str = entry_1.get()
-    
-    # Check if the function is empty or still has the placeholder
-    if func_str == "" or func_str == "Enter your function here":
-        entry_3.delete("1.0", "end")
-        entry_3.insert("1.0", "Please enter a function")
-        entry_3.config(fg=TEXT_COLOR)  # Set text color
-        return
-    
-    # Get the lower and upper limits
-    try:
-        lower_limit = float(entry_4.get())
-        upper_limit = float(entry_5.get())
-    except ValueError:
-        entry_3.delete("1.0", "end")
-        entry_3.insert("1.0", "Please enter valid limits")
-        entry_3.config(fg=TEXT_COLOR)  # Set text color
-        return
-    
-    try:
-        # Parse the function using our enhanced parser
-        func = parse_user_function(func_str)
-        
-        # Convert the function string to sympy format for integral calculation
-        x = sp.Symbol('x')
-        sympy_str = func_str.replace('^', '**')
-        sympy_str = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', sympy_str)
-        sympy_str = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', sympy_str)
-        sympy_str = re.sub(r'\)([a-zA-Z])', r')*\1', sympy_str)
-        sympy_str = re.sub(r'([a-zA-Z])\(', r'\1*(', sympy_str)
-        expr = sp.sympify(sympy_str)
-        
-        # Calculate the indefinite integral
-        indefinite_integral = sp.integrate(expr, x)
-        
-        # Calculate the definite integral
-        definite_integral = sp.integrate(expr, (x, lower_limit, upper_limit))
-        
-        # Convert the integrals to a more natural format
-        indefinite_str = str(indefinite_integral)
-        indefinite_str = indefinite_str.replace('**', '^')
-        indefinite_str = indefinite_str.replace('*', '')
-        
-        # Display the results
-        entry_3.delete("1.0", "end")
-        entry_3.insert("1.0", f"∫({func_str})dx = {indefinite_str} + C")
-        entry_3.insert("end", f"\n∫({func_str})dx from {lower_limit} to {upper_limit} = {definite_integral}")
-        entry_3.config(fg=TEXT_COLOR)  # Set text color
-        
-    except Exception as e:
-        # If sympy fails, fall back to numerical integration
-        result = process_user_integration(func_str, lower_limit, upper_limit)
-        
-        # Display the result
-        entry_3.delete("1.0", "end")
-        if result["success"]:
-            entry_3.insert("1.0", f"Numerical result: {result['result']:.6f}")
-        else:
-            entry_3.insert("1.0", f"Error: {result['message']}")
-        entry_3.config(fg=TEXT_COLOR)  # Set text color
-
 # Function to calculate both derivative and integral
 def calculate_all():
     # Get the function from the input field
     func_str = entry_1.get()
     
-    # Calculate derivative and integral
-    calculate_derivative()
-    calculate_integral()
+    # Check if the function is empty or still has the placeholder
+    if func_str == "" or func_str == "Enter your function here":
+        for widget in (entry_2, entry_3):
+            widget.delete("1.0", "end")
+            widget.insert("1.0", "Please enter a function")
+            widget.config(fg=TEXT_COLOR)  # Set text color
     
-    # Update the graphs
+    # Compute the derivative, integral and graphs in the background
     update_graphs(func_str)
 
 button_image_1 = PhotoImage(
@@ -965,8 +758,10 @@ button_1.bind('<Enter>', button_1_hover)
 button_1.bind('<Leave>', button_1_leave)
 
 # Function to save graph as image
-def save_graph_as_image(fig, default_filename):
-    """Save the matplotlib figure as an image file with user-selected location"""
+def save_graph_as_image(panel, default_filename):
+    """Save a graph panel's figure as an image file with user-selected location"""
+    if panel is None:
+        return False, None
     try:
         # Ask user where to save the file
         file_path = filedialog.asksaveasfilename(
@@ -980,7 +775,7 @@ def save_graph_as_image(fig, default_filename):
             return False
         
         # Create a temporary file with the specified name
-        fig.savefig(file_path, dpi=300, bbox_inches='tight', facecolor="#3159EE", edgecolor='white')
+        panel.save(file_path, dpi=300, bbox_inches='tight', facecolor="#3159EE", edgecolor='white')
         return True, file_path
     except Exception as e:
         print(f"Error saving graph: {str(e)}")
@@ -994,7 +789,7 @@ def save_original_function_graph():
     default_filename = f"original_function_{timestamp}.png"
     
     # Save the graph
-    success, file_path = save_graph_as_image(fig1, default_filename)
+    success, file_path = save_graph_as_image(panel1, default_filename)
     if success:
         # Show success message
         messagebox.showinfo("Success", f"Graph saved as {file_path}")
@@ -1011,7 +806,7 @@ def save_derivative_graph():
     default_filename = f"derivative_{timestamp}.png"
     
     # Save the graph
-    success, file_path = save_graph_as_image(fig2, default_filename)
+    success, file_path = save_graph_as_image(panel2, default_filename)
     if success:
         # Show success message
         messagebox.showinfo("Success", f"Graph saved as {file_path}")
@@ -1028,7 +823,7 @@ def save_integral_graph():
     default_filename = f"integral_{timestamp}.png"
     
     # Save the graph
-    success, file_path = save_graph_as_image(fig3, default_filename)
+    success, file_path = save_graph_as_image(panel3, default_filename)
     if success:
         # Show success message
         messagebox.showinfo("Success", f"Graph saved as {file_path}")
@@ -1140,5 +935,25 @@ add_placeholder(entry_3, "e.g. ∫(x^2 + 2x + 1)dx = x^3/3 + x^2 + x + C", is_en
 add_placeholder(entry_4, "Lower bound (e.g. 0)")
 add_placeholder(entry_5, "Upper bound (e.g. 2)")
 
+# Editing the function makes running calculations stale
+entry_1.bind("<KeyRelease>", on_function_edited)
+
+# Editing the limits only moves the markers and recomputes the area
+entry_4.bind("<KeyRelease>", on_bounds_edited)
+entry_5.bind("<KeyRelease>", on_bounds_edited)
+
+def on_close():
+    """Stop the worker processes before closing the window"""
+    scheduler.shutdown()
+    window.destroy()
+    if options.timings:
+        print(timer.report())
+
+window.protocol("WM_DELETE_WINDOW", on_close)
+
 window.resizable(False, False)
+timer.mark("window built")
+
+if options.eager:
+    create_graph_panels()
 window.mainloop()
@@ -1,9 +1,9 @@
 import numpy as np
 from scipy import integrate
-import matplotlib.pyplot as plt
-from typing import Callable, Tuple, Union, Dict, List, Any
-import re
+from typing import Callable, Tuple, Union, Dict, List, Any, Optional
 import math
+import warnings
+from expression import compile_expression
 
 
 def integrate_function(func: Callable[[float], float], lower_bound: float, upper_bound: float, **kwargs) -> Tuple[float, float]:
@@ -23,31 +23,319 @@ def integrate_function(func: Callable[[float], float], lower_bound: float, upper
     return result
 
 
-def cumulative_integral(func: Callable[[float], float], x_values: np.ndarray, lower_bound: float = None) -> np.ndarray:
+# 15-point Kronrod rule with its embedded 7-point Gauss rule (QUADPACK qk15)
+_KRONROD_NODES = np.array([
+    0.991455371120812639206854697526329,
+    0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926,
+    0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013,
+    0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245,
+])
+_KRONROD_WEIGHTS = np.array([
+    0.022935322010529224963732008058970,
+    0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518,
+    0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550,
+    0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649,
+])
+_KRONROD_CENTER_WEIGHT = 0.209482141084727828012999174891714
+_GAUSS_WEIGHTS = np.array([
+    0.129484966168869693270611432679082,
+    0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975,
+])
+_GAUSS_CENTER_WEIGHT = 0.417959183673469387755102040816327
+
+# Full node/weight vectors on [-1, 1], ordered left to right
+GK15_NODES = np.concatenate([-_KRONROD_NODES, [0.0], _KRONROD_NODES[::-1]])
+GK15_KRONROD_WEIGHTS = np.concatenate([_KRONROD_WEIGHTS, [_KRONROD_CENTER_WEIGHT], _KRONROD_WEIGHTS[::-1]])
+GK15_GAUSS_WEIGHTS = np.zeros(15)
+GK15_GAUSS_WEIGHTS[1:7:2] = _GAUSS_WEIGHTS
+GK15_GAUSS_WEIGHTS[7] = _GAUSS_CENTER_WEIGHT
+GK15_GAUSS_WEIGHTS[9:15:2] = _GAUSS_WEIGHTS[::-1]
+
+
+def evaluate_vectorized(func: Callable[[float], float], x_values: np.ndarray, **params) -> np.ndarray:
+    """
+    Evaluate func over an array, falling back to per-element calls for
+    functions that only accept scalars.
+    
+    Args:
+        func: The function to evaluate
+        x_values: Array of x values (any shape)
+        **params: Extra keyword arguments for func, broadcast against x_values
+        
+    Returns:
+        Float array with the broadcast shape of x_values and params
+    """
+    shape = np.broadcast_shapes(np.shape(x_values), *(np.shape(v) for v in params.values()))
+    try:
+        with np.errstate(all='ignore'):
+            values = np.asarray(func(x_values, **params), dtype=float)
+        if values.shape == shape:
+            return values
+    except Exception:
+        pass
+    with np.errstate(all='ignore'):
+        return np.vectorize(func, otypes=[float])(x_values, **params)
+
+
+def gauss_kronrod(func: Callable[[float], float], lower_bounds: np.ndarray, upper_bounds: np.ndarray,
+                  params: Optional[Dict[str, np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Apply the 15-point Gauss-Kronrod rule to many intervals at once.
+    
+    All nodes of all intervals are evaluated in a single call to func.
+    
+    Args:
+        func: The function to integrate
+        lower_bounds: Array of interval starts
+        upper_bounds: Array of interval ends (same shape as lower_bounds)
+        params: Optional keyword arguments for func, one value per interval
+            (arrays broadcastable to the shape of lower_bounds)
+        
+    Returns:
+        Tuple containing (integral estimates, error estimates) per interval
+    """
+    center = (lower_bounds + upper_bounds) / 2
+    half_width = (upper_bounds - lower_bounds) / 2
+    nodes = center[..., None] + half_width[..., None] * GK15_NODES
+    node_params = {name: np.asarray(value, dtype=float)[..., None] for name, value in (params or {}).items()}
+    values = evaluate_vectorized(func, nodes, **node_params)
+    with np.errstate(all='ignore'):
+        kronrod = half_width * (values @ GK15_KRONROD_WEIGHTS)
+        gauss = half_width * (values @ GK15_GAUSS_WEIGHTS)
+        return kronrod, np.abs(kronrod - gauss)
+
+
+def adaptive_gauss_kronrod(func: Callable[[float], float], lower_bounds: np.ndarray, upper_bounds: np.ndarray,
+                           epsabs: float = 1.49e-8, epsrel: float = 1.49e-8, max_depth: int = 30,
+                           limit: int = 200000,
+                           params: Optional[Dict[str, np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integrate func over many intervals with vectorized adaptive Gauss-Kronrod.
+    
+    Every pass evaluates all unfinished sub-intervals together and bisects
+    only those whose error estimate is above tolerance. Each piece gets the
+    share of its interval's tolerance given by its share of the width, so the
+    pieces' errors add up to at most the interval's tolerance. A piece whose
+    estimate is infinite or NaN (e.g. a pole on a node) is bisected too, so a
+    removable singularity moves off the nodes. Like quad, an
+    IntegrationWarning is issued when max_depth or limit stops refinement
+    before every interval has converged, which includes poles.
+    
+    Args:
+        func: The function to integrate
+        lower_bounds: Array of interval starts
+        upper_bounds: Array of interval ends
+        epsabs: Absolute error tolerance per interval
+        epsrel: Relative error tolerance per interval
+        max_depth: Maximum number of bisections of any interval
+        limit: Maximum number of sub-intervals evaluated in one pass
+        params: Optional keyword arguments for func; arrays broadcast against
+            the bounds, so each integral may use its own parameter values
+        
+    Returns:
+        Tuple containing (integral values, estimated absolute errors) with the
+        broadcast shape of the bounds and params
+    """
+    params = {name: np.asarray(value, dtype=float) for name, value in (params or {}).items()}
+    lower_bounds = np.asarray(lower_bounds, dtype=float)
+    upper_bounds = np.asarray(upper_bounds, dtype=float)
+    shape = np.broadcast_shapes(lower_bounds.shape, upper_bounds.shape, *(v.shape for v in params.values()))
+    lower = np.broadcast_to(lower_bounds, shape).ravel()
+    upper = np.broadcast_to(upper_bounds, shape).ravel()
+    params = {name: np.broadcast_to(value, shape).ravel() for name, value in params.items()}
+    owner = np.arange(lower.size)
+    widths = np.abs(upper - lower)
+    
+    results = np.zeros(lower.size)
+    errors = np.zeros(lower.size)
+    interval_tolerance = None
+    unconverged = 0
+    
+    for depth in range(max_depth + 1):
+        if lower.size == 0:
+            break
+        values, errs = gauss_kronrod(func, lower, upper, {name: value[owner] for name, value in params.items()})
+        if interval_tolerance is None:
+            interval_tolerance = np.where(np.isfinite(values), np.maximum(epsabs, epsrel * np.abs(values)), epsabs)
+        
+        # Each piece gets the share of its interval's tolerance matching its share of the width
+        with np.errstate(all='ignore'):
+            share = np.where(widths[owner] > 0, np.abs(upper - lower) / widths[owner], 1.0)
+        tolerance = interval_tolerance[owner] * share
+        done = (errs <= tolerance) & np.isfinite(values)
+        if depth == max_depth or 2 * np.count_nonzero(~done) > limit:
+            unconverged = np.unique(owner[~done]).size
+            done[:] = True
+        
+        np.add.at(results, owner[done], values[done])
+        np.add.at(errors, owner[done], errs[done])
+        
+        # Bisect the rest
+        refine = ~done
+        lower, upper, owner = lower[refine], upper[refine], owner[refine]
+        middle = (lower + upper) / 2
+        lower = np.concatenate([lower, middle])
+        upper = np.concatenate([middle, upper])
+        owner = np.concatenate([owner, owner])
+    
+    if unconverged:
+        warnings.warn(f"The maximum number of subdivisions has been reached for {unconverged} of "
+                      f"{results.size} interval(s); the result may be inaccurate (singularity or "
+                      f"slow convergence)", integrate.IntegrationWarning, stacklevel=2)
+    return results.reshape(shape), errors.reshape(shape)
+
+
+def cumulative_integral(func: Callable[[float], float], x_values: np.ndarray, lower_bound: float = None,
+                        return_error: bool = False, **kwargs) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
     """
     Calculate the cumulative integral of a function over a range of x values.
     This is useful for plotting the integral function.
     
+    Each consecutive sub-interval between sorted x values is integrated once
+    with adaptive Gauss-Kronrod and the pieces are accumulated, instead of
+    integrating from lower_bound to every point separately.
+    
     Args:
         func: The function to integrate
         x_values: Array of x values to calculate the cumulative integral for
         lower_bound: Starting point for integration (defaults to min(x_values))
+        return_error: Also return the accumulated error bound for each point
+        **kwargs: Additional parameters to pass to adaptive_gauss_kronrod
         
     Returns:
-        Array of cumulative integral values corresponding to x_values
+        Array of cumulative integral values corresponding to x_values,
+        or a tuple (values, error bounds) if return_error is True
     """
+    x_values = np.asarray(x_values, dtype=float)
     if lower_bound is None:
         lower_bound = np.min(x_values)
     
     integral_values = np.zeros_like(x_values, dtype=float)
+    error_bounds = np.zeros_like(x_values, dtype=float)
     
-    for i, x in enumerate(x_values):
-        if x > lower_bound:
-            integral_values[i], _ = integrate_function(func, lower_bound, x)
+    # Points strictly above the lower bound, visited in increasing order
+    mask = x_values > lower_bound
+    points = np.unique(x_values[mask])
+    if points.size:
+        edges = np.concatenate([[lower_bound], points])
+        pieces, piece_errors = adaptive_gauss_kronrod(func, edges[:-1], edges[1:], **kwargs)
+        cumulative = np.cumsum(pieces)
+        cumulative_errors = np.cumsum(piece_errors)
+        index = np.searchsorted(points, x_values[mask])
+        integral_values[mask] = cumulative[index]
+        error_bounds[mask] = cumulative_errors[index]
     
+    if return_error:
+        return integral_values, error_bounds
     return integral_values
 
 
+def integrate_intervals(func: Callable[[float], float], lower_bounds: np.ndarray, upper_bounds: np.ndarray,
+                        method: str = "adaptive", params: Optional[Dict[str, np.ndarray]] = None,
+                        panels: int = 1, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integrate func over many (lower, upper) pairs in a few vectorized passes.
+    
+    The bounds and any parameter arrays broadcast together; every integral of
+    the batch is evaluated on one stacked array of nodes per pass instead of
+    one quad call per integral.
+    
+    Args:
+        func: The function to integrate (e.g. from parse_user_function)
+        lower_bounds: Array of lower limits
+        upper_bounds: Array of upper limits
+        method: "adaptive" (adaptive Gauss-Kronrod per integral), "fixed"
+            (15-point Gauss-Kronrod on panels equal sub-intervals, no
+            refinement) or "quad_vec" (scipy.integrate.quad_vec on the whole
+            batch as one vector-valued integral)
+        params: Optional keyword arguments for func, broadcast against the bounds
+        panels: Number of equal sub-intervals per integral for the fixed rule
+        **kwargs: Additional parameters to pass to adaptive_gauss_kronrod or quad_vec
+        
+    Returns:
+        Tuple containing (integral values, estimated absolute errors) with the
+        broadcast shape of the bounds and params. quad_vec only estimates the
+        error of the batch as a whole, which is reported for every integral.
+        
+    Raises:
+        ValueError: If any bound is infinite or NaN (use integrate_function,
+            which calls quad, for infinite limits)
+    """
+    params = {name: np.asarray(value, dtype=float) for name, value in (params or {}).items()}
+    lower_bounds = np.asarray(lower_bounds, dtype=float)
+    upper_bounds = np.asarray(upper_bounds, dtype=float)
+    non_finite = np.count_nonzero(~np.isfinite(lower_bounds)) + np.count_nonzero(~np.isfinite(upper_bounds))
+    if non_finite:
+        raise ValueError(f"{non_finite} integration bound(s) are infinite or NaN; "
+                         "integrate_intervals only supports finite limits (use integrate_function)")
+    shape = np.broadcast_shapes(lower_bounds.shape, upper_bounds.shape, *(v.shape for v in params.values()))
+    lower = np.broadcast_to(lower_bounds, shape)
+    upper = np.broadcast_to(upper_bounds, shape)
+    params = {name: np.broadcast_to(value, shape) for name, value in params.items()}
+    
+    if method == "adaptive":
+        return adaptive_gauss_kronrod(func, lower, upper, params=params, **kwargs)
+    
+    if method == "fixed":
+        if panels < 1:
+            raise ValueError("panels must be at least 1")
+        edges = lower[..., None] + (upper - lower)[..., None] * np.linspace(0.0, 1.0, panels + 1)
+        values, errors = gauss_kronrod(func, edges[..., :-1], edges[..., 1:],
+                                       {name: value[..., None] for name, value in params.items()})
+        return values.sum(axis=-1), errors.sum(axis=-1)
+    
+    if method == "quad_vec":
+        # Map every interval onto [0, 1] so the batch is one vector-valued integrand
+        width = upper - lower
+        
+        def integrand(t):
+            return evaluate_vectorized(func, lower + width * t, **params) * width
+        
+        kwargs.setdefault("norm", "max")
+        result, error = integrate.quad_vec(integrand, 0.0, 1.0, **kwargs)[:2]
+        return np.asarray(result, dtype=float).reshape(shape), np.full(shape, float(error))
+    
+    raise ValueError(f"Unknown integration method '{method}'")
+
+
+def integrate_parameter_sweep(func_str: str, lower_bound: Union[float, np.ndarray], upper_bound: Union[float, np.ndarray],
+                              parameters: Dict[str, Any], method: str = "adaptive", grid: bool = False,
+                              **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integrate an expression with parameters over arrays of parameter values.
+    
+    For example integrate_parameter_sweep("a*sin(k*x)", 0, pi, {"a": 2, "k": ks})
+    returns one integral per value in ks. The expression is compiled once and
+    all integrals are computed together by integrate_intervals.
+    
+    Args:
+        func_str: String representation of the function, using x and the parameter names
+        lower_bound: Lower limit (scalar or array broadcast against the parameters)
+        upper_bound: Upper limit (scalar or array broadcast against the parameters)
+        parameters: Mapping from parameter name to a value or array of values
+        method: "adaptive", "fixed" or "quad_vec" (see integrate_intervals)
+        grid: Sweep the full grid of parameter combinations (one axis per
+            parameter, in the order given) instead of broadcasting them together
+        **kwargs: Additional parameters to pass to integrate_intervals
+        
+    Returns:
+        Tuple containing (integral values, estimated absolute errors) as arrays
+    """
+    func = parse_user_function(func_str, tuple(parameters))
+    values = {name: np.asarray(value, dtype=float) for name, value in parameters.items()}
+    if grid:
+        mesh = np.meshgrid(*(value.ravel() for value in values.values()), indexing="ij")
+        values = dict(zip(values, mesh))
+    return integrate_intervals(func, lower_bound, upper_bound, method=method, params=values, **kwargs)
+
+
 def integrate_common_functions() -> Dict[str, Callable[[float], float]]:
     """
     Return a dictionary of common mathematical functions and their analytical integrals.
@@ -92,74 +380,18 @@ def get_integral_error(func: Callable[[float], float], analytical_integral: Call
     return abs(numerical_result - analytical_result)
 
 
-def parse_user_function(func_str):
-    """Parse user input function string into a callable function"""
+def parse_user_function(func_str, parameters: Tuple[str, ...] = ()):
+    """
+    Parse user input function string into a callable function.
+
+    The string is compiled once (see expression.compile_expression); the
+    returned callable evaluates a whole NumPy array in one call and uses a
+    scalar fast path when called with a single number, e.g. by quad.
+    Names listed in parameters (e.g. ('a', 'k')) are allowed besides x and
+    are passed as keyword arguments when calling.
+    """
     try:
-        # Replace common mathematical notations with Python syntax
-        func_str = func_str.replace('^', '**')  # Handle exponents
-        
-        # Handle pi and e
-        func_str = func_str.replace('pi', 'np.pi')
-        func_str = func_str.replace('e', 'np.e')
-        
-        # Handle implicit multiplication
-        func_str = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', func_str)  # 2x -> 2*x
-        func_str = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', func_str)  # x2 -> x*2
-        func_str = re.sub(r'\)([a-zA-Z])', r')*\1', func_str)     # (x+1)x -> (x+1)*x
-        func_str = re.sub(r'([a-zA-Z])\(', r'\1*(', func_str)     # x(x+1) -> x*(x+1)
-        
-        # Handle exponential function
-        func_str = re.sub(r'e\^\((.*?)\)', r'np.exp(\1)', func_str)
-        func_str = re.sub(r'e\^(.*?)(?=[+\-*/) ]|$)', r'np.exp(\1)', func_str)
-        
-        # Handle trigonometric functions with proper numpy syntax
-        func_str = re.sub(r'sin\((.*?)\)', r'np.sin(\1)', func_str)
-        func_str = re.sub(r'cos\((.*?)\)', r'np.cos(\1)', func_str)
-        func_str = re.sub(r'tan\((.*?)\)', r'np.tan(\1)', func_str)
-        func_str = re.sub(r'csc\((.*?)\)', r'1/np.sin(\1)', func_str)
-        func_str = re.sub(r'sec\((.*?)\)', r'1/np.cos(\1)', func_str)
-        func_str = re.sub(r'cot\((.*?)\)', r'1/np.tan(\1)', func_str)
-        
-        # Handle inverse trigonometric functions
-        func_str = re.sub(r'arcsin\((.*?)\)', r'np.arcsin(\1)', func_str)
-        func_str = re.sub(r'arccos\((.*?)\)', r'np.arccos(\1)', func_str)
-        func_str = re.sub(r'arctan\((.*?)\)', r'np.arctan(\1)', func_str)
-        
-        # Handle exponential and logarithmic functions
-        func_str = re.sub(r'exp\((.*?)\)', r'np.exp(\1)', func_str)
-        func_str = re.sub(r'log\((.*?)\)', r'np.log(\1)', func_str)
-        func_str = re.sub(r'ln\((.*?)\)', r'np.log(\1)', func_str)
-        
-        # Handle square root
-        func_str = re.sub(r'sqrt\((.*?)\)', r'np.sqrt(\1)', func_str)
-        
-        # Create a safe dictionary with allowed mathematical functions
-        safe_dict = {
-            'np': np,
-            'sin': lambda x: np.sin(x),
-            'cos': lambda x: np.cos(x),
-            'tan': lambda x: np.tan(x),
-            'arcsin': lambda x: np.arcsin(x),
-            'arccos': lambda x: np.arccos(x),
-            'arctan': lambda x: np.arctan(x),
-            'exp': lambda x: np.exp(x),
-            'log': lambda x: np.log(x),
-            'sqrt': lambda x: np.sqrt(x),
-            'pi': np.pi,
-            'e': np.e
-        }
-        
-        # Create a lambda function that uses numpy for mathematical operations
-        def func(x):
-            try:
-                # Convert x to numpy array if it's a scalar
-                if not isinstance(x, np.ndarray):
-                    x = np.array(x)
-                return eval(func_str, {'x': x, **safe_dict})
-            except Exception as e:
-                raise ValueError(f"Error evaluating function: {str(e)}")
-        
-        return func
+        return compile_expression(str(func_str), parameters)
     except Exception as e:
         raise ValueError(f"Error parsing function: {str(e)}")
 
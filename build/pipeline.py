@@ -0,0 +1,205 @@
+import warnings
+
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+from scipy.integrate import IntegrationWarning
+
+from integration import parse_user_function, integrate_function, cumulative_integral
+from sampling import adaptive_sample, break_discontinuities, get_sample_cache, weighted_quantiles
+import symbolic
+
+
+# Fixed graph range used by the plot panels
+X_RANGE = (-5, 5)
+
+
+def numerical_derivative(func, x, h=0.0001):
+    """Compute derivative using central difference method (x may be an array)"""
+    return (func(x + h) - func(x - h)) / (2 * h)
+
+
+def plot_limits(x_values: np.ndarray, y_values: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    Choose axis limits for a curve.
+
+    The x range covers the interesting region where the curve is defined. The
+    y range covers the curve with a 10% margin, except that spikes near poles
+    are clipped so they do not flatten everything else.
+
+    Args:
+        x_values: Sample positions
+        y_values: Curve values at x_values (may contain NaN or inf)
+
+    Returns:
+        Tuple containing (x_min, x_max, y_min, y_max), always finite
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    finite = np.isfinite(y_values)
+    if not finite.any():
+        return X_RANGE[0], X_RANGE[1], -1.0, 1.0
+
+    x_lo, x_hi = x_values[finite].min(), x_values[finite].max()
+    if x_hi - x_lo < (X_RANGE[1] - X_RANGE[0]) / 4:
+        x_lo, x_hi = X_RANGE
+
+    y_lo, y_hi = y_values[finite].min(), y_values[finite].max()
+    q_lo, q_hi = weighted_quantiles(x_values, y_values, [0.02, 0.98])
+    if y_hi - y_lo > 20 * (q_hi - q_lo) and q_hi > q_lo:
+        # Poles or spikes dominate; show the bulk of the curve
+        y_lo, y_hi = q_lo, q_hi
+
+    y_range = y_hi - y_lo
+    if y_range <= 0:
+        y_range = max(abs(y_hi), 1.0) * 10
+    return x_lo, x_hi, y_lo - y_range * 0.1, y_hi + y_range * 0.1
+
+
+def numeric_curves(func_str: str, integration_bounds: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """
+    Compute everything the plot panels need without touching sympy.
+
+    Curves are sampled adaptively (see sampling.adaptive_sample). The
+    derivative is a central difference and the integral curve is the
+    cumulative integral from the first point where the function is defined.
+
+    Args:
+        func_str: String representation of the function
+        integration_bounds: Optional (lower, upper) limits for the definite integral
+
+    Returns:
+        Dictionary with the sample grid, the three curves, their axis limits
+        and the numerical definite integral (None without bounds)
+    """
+    func = parse_user_function(func_str)
+    x_min, x_max = X_RANGE
+
+    # Samples are kept per expression so re-plotting reuses earlier evaluations
+    samples = get_sample_cache(("f", func.normalized), func)
+    x_values, y_values = adaptive_sample(samples, x_min, x_max)
+    x_prime, y_prime = adaptive_sample(lambda x: numerical_derivative(func, x), x_min, x_max)
+
+    # Accumulate the integral from where the function is first defined
+    x_integral = x_values[np.isfinite(y_values)]
+    y_integral = np.full_like(x_integral, np.nan)
+    if x_integral.size:
+        # Pieces next to a pole cannot converge; the curve is broken there anyway
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", IntegrationWarning)
+            y_integral = cumulative_integral(func, x_integral, x_integral[0])
+    x_integral, y_integral = break_discontinuities(x_integral, y_integral)
+
+    definite_integral = None
+    if integration_bounds:
+        try:
+            definite_integral, _ = integrate_function(func, integration_bounds[0], integration_bounds[1])
+        except Exception:
+            pass
+
+    return {
+        "function": func_str,
+        "integration_bounds": integration_bounds,
+        "x_values": x_values,
+        "y_values": y_values,
+        "x_prime": x_prime,
+        "y_prime": y_prime,
+        "x_integral": x_integral,
+        "y_integral": y_integral,
+        "function_limits": plot_limits(x_values, y_values),
+        "derivative_limits": plot_limits(x_prime, y_prime),
+        "integral_limits": plot_limits(x_integral, y_integral),
+        "definite_integral": definite_integral,
+    }
+
+
+def definite_integral(func_str: str, integration_bounds: Tuple[float, float]) -> Dict[str, Any]:
+    """
+    Compute only the numerical definite integral, e.g. while the limits are edited.
+
+    Args:
+        func_str: String representation of the function
+        integration_bounds: (lower, upper) limits
+
+    Returns:
+        Dictionary with the function, the bounds and the definite integral
+    """
+    func = parse_user_function(func_str)
+    result, _ = integrate_function(func, integration_bounds[0], integration_bounds[1])
+    return {
+        "function": func_str,
+        "integration_bounds": integration_bounds,
+        "definite_integral": result,
+    }
+
+
+def _analytic_curve(expr) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """Adaptively sample a sympy expression, or return (None, None) if it uses anything the parser lacks."""
+    # str() keeps every '*' and '**' (unlike the display form), e.g. 2*3**x/log(3)
+    try:
+        func = parse_user_function(str(expr))
+    except ValueError:
+        return None, None
+    return adaptive_sample(get_sample_cache(("f", func.normalized), func), X_RANGE[0], X_RANGE[1])
+
+
+def exact_integral(func_str: str, integration_bounds: Tuple[float, float]) -> Dict[str, Any]:
+    """
+    Compute the exact definite integral with sympy.
+
+    This can be slow, so it is a job of its own, only run when the numerical
+    area is not available.
+
+    Args:
+        func_str: String representation of the function
+        integration_bounds: (lower, upper) limits
+
+    Returns:
+        Dictionary with the function, the bounds and the exact integral as a string
+    """
+    result = symbolic.definite_integral(func_str, integration_bounds[0], integration_bounds[1])
+    return {
+        "function": func_str,
+        "integration_bounds": integration_bounds,
+        "exact_integral": str(result),
+    }
+
+
+def symbolic_forms(func_str: str, integration_bounds: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """
+    Compute the symbolic derivative and antiderivative of a function.
+
+    Where the results can be parsed back, the analytic derivative and
+    antiderivative (with C = 0) are also sampled adaptively so they can replace
+    the numerical curves. The exact definite integral is left to exact_integral.
+
+    Args:
+        func_str: String representation of the function
+        integration_bounds: Optional (lower, upper) limits, passed through to the result
+
+    Returns:
+        Dictionary with display strings, LaTeX and, when available, the
+        analytic curves and their axis limits
+    """
+    derivative_expr = symbolic.derivative(func_str)
+    integral_expr = symbolic.antiderivative(func_str)
+    derivative_str = symbolic.format_expression(derivative_expr)
+    integral_str = symbolic.format_expression(integral_expr)
+
+    x_prime, y_prime = _analytic_curve(derivative_expr)
+    x_integral, y_integral = _analytic_curve(integral_expr)
+
+    return {
+        "function": func_str,
+        "integration_bounds": integration_bounds,
+        "derivative": derivative_str,
+        "integral": integral_str,
+        "function_latex": symbolic.latex(func_str),
+        "derivative_latex": symbolic.latex(func_str, "derivative"),
+        "integral_latex": symbolic.latex(func_str, "integral"),
+        "x_prime": x_prime,
+        "y_prime": y_prime,
+        "x_integral": x_integral,
+        "y_integral": y_integral,
+        "derivative_limits": plot_limits(x_prime, y_prime) if y_prime is not None else None,
+        "integral_limits": plot_limits(x_integral, y_integral) if y_integral is not None else None,
+    }
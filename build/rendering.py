@@ -0,0 +1,181 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+from matplotlib.mathtext import MathTextParser
+
+
+PANEL_COLOR = "#3159EE"
+
+
+def style_axes(ax, title: str, ylabel: str) -> None:
+    """Apply the app's look to an axes"""
+    ax.set_facecolor(PANEL_COLOR)
+    ax.grid(True, linestyle='--', alpha=0.7, color='white')
+    ax.axhline(y=0, color='white', linestyle='-', alpha=0.3)
+    ax.axvline(x=0, color='white', linestyle='-', alpha=0.3)
+    ax.set_title(title, fontsize=10, color='white')
+    ax.set_xlabel('x', fontsize=8, color='white')
+    ax.set_ylabel(ylabel, fontsize=8, color='white')
+    ax.tick_params(colors='white')
+    ax.spines['top'].set_color('white')
+    ax.spines['right'].set_color('white')
+    ax.spines['bottom'].set_color('white')
+    ax.spines['left'].set_color('white')
+
+
+_MATHTEXT = MathTextParser("path")
+
+
+@lru_cache(maxsize=256)
+def is_valid_mathtext(label: str) -> bool:
+    """Return True if matplotlib can render label (text with $...$ mathtext)"""
+    if label.count("$") - label.count("\\$") < 2:
+        return True
+    try:
+        _MATHTEXT.parse(label)
+        return True
+    except ValueError:
+        return False
+
+
+def mathtext_label(label: str, fallback: str) -> str:
+    """
+    Return label if it renders, else fallback.
+
+    Labels built from user input or sympy LaTeX may use syntax mathtext does
+    not support (e.g. double superscripts or \\bmod); a bad label would
+    otherwise break the whole draw.
+    """
+    return label if is_valid_mathtext(label) else fallback
+
+
+class PlotPanel:
+    """
+    One graph panel whose styled axes are built once and whose artists are
+    updated in place.
+
+    The curve, the integration-bound markers and the two annotations are
+    animated artists: a full canvas draw renders only the static background
+    (grid, spines, ticks, titles), which is cached, and the artists are then
+    blitted on top. Changing the data, bounds or labels without changing the
+    axis limits therefore costs a blit of this panel only; changing the limits
+    needs a full redraw of this panel's canvas (ticks move), and nothing is
+    redrawn at all if nothing changed.
+    """
+
+    def __init__(self, ax, canvas, title: str, ylabel: str, color: str):
+        """
+        Args:
+            ax: The matplotlib axes of this panel
+            canvas: The FigureCanvas holding ax
+            title: Axes title
+            ylabel: Label of the y axis
+            color: Color of the curve
+        """
+        self.ax = ax
+        self.canvas = canvas
+        style_axes(ax, title, ylabel)
+
+        box = dict(facecolor=PANEL_COLOR, alpha=0.7, edgecolor='white')
+        self.line, = ax.plot([], [], color=color, linewidth=2, animated=True)
+        self.bound_lines = [
+            ax.axvline(x=0, color='white', linestyle='--', alpha=0.8, visible=False, animated=True)
+            for _ in range(2)
+        ]
+        self.area_text = ax.text(0.05, 0.05, '', transform=ax.transAxes, fontsize=9, color='white',
+                                 verticalalignment='bottom', bbox=box, visible=False, animated=True)
+        self.label_text = ax.text(0.05, 0.95, '', transform=ax.transAxes, fontsize=9, color='white',
+                                  verticalalignment='top', bbox=box, visible=False, animated=True)
+        self.artists = [self.line, *self.bound_lines, self.area_text, self.label_text]
+
+        self._background = None
+        self._limits = None
+        self._data = (np.empty(0), np.empty(0))
+        self._annotations = None
+        self.full_draws = 0
+        self.blits = 0
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event) -> None:
+        """Cache the freshly drawn background and paint the artists over it"""
+        self._background = self.canvas.copy_from_bbox(self.ax.figure.bbox)
+        self._draw_artists()
+        self.full_draws += 1
+
+    def _draw_artists(self) -> None:
+        for artist in self.artists:
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+    def update(self, x_values: np.ndarray, y_values: np.ndarray, limits: Tuple[float, float, float, float],
+               label: str, integration_bounds: Optional[Tuple[float, float]] = None,
+               area: Optional[float] = None) -> bool:
+        """
+        Show a curve with its expression and optional integration bounds.
+
+        Args:
+            x_values: Curve x values
+            y_values: Curve y values (NaN breaks the line)
+            limits: (x_min, x_max, y_min, y_max)
+            label: Expression annotation (may contain mathtext)
+            integration_bounds: Optional (lower, upper) markers
+            area: Definite integral shown next to the bounds
+
+        Returns:
+            True if anything was redrawn
+        """
+        data_changed = not (np.array_equal(self._data[0], x_values)
+                            and np.array_equal(self._data[1], y_values, equal_nan=True))
+        if data_changed:
+            self._data = (np.asarray(x_values), np.asarray(y_values))
+            self.line.set_data(x_values, y_values)
+
+        annotations = (label, integration_bounds, area)
+        annotations_changed = annotations != self._annotations
+        if annotations_changed:
+            self._annotations = annotations
+            self.label_text.set_text(label)
+            self.label_text.set_visible(True)
+            for line, x in zip(self.bound_lines, integration_bounds or (None, None)):
+                line.set_visible(x is not None)
+                if x is not None:
+                    line.set_xdata([x, x])
+            self.area_text.set_visible(bool(integration_bounds) and area is not None)
+            if area is not None:
+                self.area_text.set_text(f'Area = {area:.4f}')
+
+        limits = tuple(float(v) for v in limits)
+        if limits != self._limits:
+            self._limits = limits
+            self.ax.set_xlim(limits[0], limits[1])
+            self.ax.set_ylim(limits[2], limits[3])
+            self.canvas.draw_idle()
+            return True
+
+        if data_changed or annotations_changed:
+            self.refresh()
+            return True
+        return False
+
+    def refresh(self) -> None:
+        """Blit the artists over the cached background, or do a full draw if there is none"""
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+        # The whole (small) figure, since labels may overhang the axes
+        self.canvas.blit(self.ax.figure.bbox)
+        self.blits += 1
+
+    def save(self, file_path: str, **kwargs) -> None:
+        """Save the figure with the artists included, as a normal static render"""
+        for artist in self.artists:
+            artist.set_animated(False)
+        try:
+            self.ax.figure.savefig(file_path, **kwargs)
+        finally:
+            for artist in self.artists:
+                artist.set_animated(True)
+            self.canvas.draw_idle()
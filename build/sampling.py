@@ -0,0 +1,249 @@
+import math
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+
+import numpy as np
+
+
+# Default point budget for one plot panel
+MAX_POINTS = 1000
+# Roughly how many points the first, uniform pass uses
+INITIAL_POINTS = 64
+# Largest allowed deviation from a straight segment, as a fraction of the y scale
+TOLERANCE = 0.002
+# Segments narrower than this fraction of the range are never split
+MIN_WIDTH = 1e-7
+# A jump larger than this fraction of the y scale across a tiny segment is a discontinuity
+JUMP_FRACTION = 0.5
+
+
+class SampleCache:
+    """
+    Memoizing wrapper around a vectorized function.
+
+    Evaluated samples are kept in sorted arrays, so re-sampling the same
+    function over an overlapping range (e.g. after the view changes) only
+    evaluates points that have not been seen before. adaptive_sample places
+    its points on a dyadic grid, which makes such overlaps exact.
+    """
+
+    def __init__(self, func: Callable[[np.ndarray], np.ndarray]):
+        self.func = func
+        self._x = np.empty(0)
+        self._y = np.empty(0)
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, x_values: np.ndarray) -> np.ndarray:
+        x_values = np.asarray(x_values, dtype=float)
+        y_values = np.empty_like(x_values)
+
+        index = np.searchsorted(self._x, x_values)
+        found = index < self._x.size
+        found[found] = self._x[index[found]] == x_values[found]
+        y_values[found] = self._y[index[found]]
+
+        missing = ~found
+        if missing.any():
+            new_x = np.unique(x_values[missing])
+            with np.errstate(all='ignore'):
+                new_y = np.asarray(self.func(new_x), dtype=float)
+            if new_y.shape != new_x.shape:
+                new_y = np.broadcast_to(new_y, new_x.shape)
+            y_values[missing] = new_y[np.searchsorted(new_x, x_values[missing])]
+
+            merged_x = np.concatenate([self._x, new_x])
+            order = np.argsort(merged_x, kind='mergesort')
+            self._x = merged_x[order]
+            self._y = np.concatenate([self._y, new_y])[order]
+
+        self.hits += int(found.sum())
+        self.misses += int(missing.sum())
+        return y_values
+
+    def __len__(self):
+        return self._x.size
+
+
+# Recently used caches, one per expression
+_CACHES = OrderedDict()
+_MAX_CACHES = 16
+
+
+def get_sample_cache(key: Hashable, func: Callable[[np.ndarray], np.ndarray]) -> SampleCache:
+    """
+    Return the shared SampleCache for key, creating it around func if needed.
+
+    Args:
+        key: Identifies the function (e.g. its normalized expression text)
+        func: The vectorized function to wrap on first use
+
+    Returns:
+        The cache for key
+    """
+    cache = _CACHES.get(key)
+    if cache is None:
+        cache = _CACHES[key] = SampleCache(func)
+    _CACHES.move_to_end(key)
+    while len(_CACHES) > _MAX_CACHES:
+        _CACHES.popitem(last=False)
+    return cache
+
+
+def _base_grid(x_min: float, x_max: float, initial_points: int) -> np.ndarray:
+    """Uniform grid on multiples of a power of two, plus both endpoints."""
+    step = 2.0 ** math.floor(math.log2((x_max - x_min) / initial_points))
+    inner = np.arange(math.ceil(x_min / step), math.floor(x_max / step) + 1) * step
+    return np.unique(np.concatenate([[x_min], inner, [x_max]]))
+
+
+def weighted_quantiles(x_values: np.ndarray, y_values: np.ndarray, quantiles) -> np.ndarray:
+    """
+    Quantiles of a sampled curve, weighting each sample by the x span it covers.
+
+    Plain percentiles of adaptive samples are biased towards the regions that
+    were refined most (typically around poles); weighting by spacing makes
+    them describe the curve instead.
+
+    Args:
+        x_values: Sorted sample positions
+        y_values: Curve values (non-finite values are ignored)
+        quantiles: Quantiles in [0, 1]
+
+    Returns:
+        Array of y values at the requested quantiles (nan if nothing is finite)
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    if x_values.size < 2:
+        weights = np.ones_like(x_values)
+    else:
+        weights = np.gradient(x_values)
+    finite = np.isfinite(y_values)
+    if not finite.any():
+        return np.full(len(quantiles), np.nan)
+    y_sorted_index = np.argsort(y_values[finite])
+    y_sorted = y_values[finite][y_sorted_index]
+    cumulative = np.cumsum(weights[finite][y_sorted_index])
+    cumulative = cumulative / cumulative[-1]
+    return np.interp(quantiles, cumulative, y_sorted)
+
+
+def _y_scale(x_values: np.ndarray, y_values: np.ndarray) -> float:
+    """Typical vertical extent of a curve, ignoring poles and spikes."""
+    lo, hi = weighted_quantiles(x_values, y_values, [0.02, 0.98])
+    scale = hi - lo
+    if not np.isfinite(scale) or scale <= 0:
+        finite = np.abs(y_values[np.isfinite(y_values)])
+        scale = max(finite.max(), 1.0) if finite.size else 1.0
+    return scale
+
+
+def break_discontinuities(x_values: np.ndarray, y_values: np.ndarray,
+                          jump_fraction: float = JUMP_FRACTION) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Insert NaN between samples that straddle a pole or a jump so matplotlib
+    does not join them with a false vertical line. Infinite values are also
+    replaced by NaN.
+
+    Args:
+        x_values: Sorted sample positions
+        y_values: Curve values
+        jump_fraction: Jump size, as a fraction of the y scale, treated as a break
+
+    Returns:
+        Tuple containing (x values, y values) ready for plotting
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.where(np.isfinite(y_values), y_values, np.nan)
+    if x_values.size < 3:
+        return x_values, y_values
+
+    scale = _y_scale(x_values, y_values)
+    dx = np.diff(x_values)
+    dy = np.abs(np.diff(y_values))
+
+    # Steps far bigger than their neighbours' (after refinement has had a go)
+    neighbour = np.minimum(np.concatenate([[np.inf], dy[:-1]]), np.concatenate([dy[1:], [np.inf]]))
+    jump = (dy > jump_fraction * scale) & (dy > 10 * neighbour)
+    # Large values of opposite sign on either side of a narrow segment: a pole
+    pole = ((y_values[:-1] * y_values[1:] < 0)
+            & (np.minimum(np.abs(y_values[:-1]), np.abs(y_values[1:])) > scale)
+            & (dx < np.median(dx) * 2))
+    breaks = np.nonzero(jump | pole)[0]
+    if breaks.size == 0:
+        return x_values, y_values
+
+    x_breaks = (x_values[breaks] + x_values[breaks + 1]) / 2
+    x_out = np.insert(x_values, breaks + 1, x_breaks)
+    y_out = np.insert(y_values, breaks + 1, np.nan)
+    return x_out, y_out
+
+
+def adaptive_sample(func: Callable[[np.ndarray], np.ndarray], x_min: float, x_max: float,
+                    max_points: int = MAX_POINTS, initial_points: int = INITIAL_POINTS,
+                    tolerance: float = TOLERANCE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample a function for plotting, refining only where it is not locally straight.
+
+    Starts from a coarse uniform grid and repeatedly bisects segments whose
+    midpoint is further than tolerance (relative to the curve's y scale) from
+    the chord, and segments at the edge of where the function is defined.
+    Refinement stops at max_points. Poles and jumps are then broken with NaN.
+
+    Args:
+        func: Vectorized function (wrap it in a SampleCache to reuse samples)
+        x_min: Left end of the range
+        x_max: Right end of the range
+        max_points: Point budget
+        initial_points: Approximate size of the first uniform pass
+        tolerance: Allowed deviation from a straight segment, as a fraction of the y scale
+
+    Returns:
+        Tuple containing (x values, y values); y is NaN at breaks and where undefined
+    """
+    x_values = _base_grid(x_min, x_max, initial_points)
+    with np.errstate(all='ignore'):
+        y_values = np.asarray(func(x_values), dtype=float)
+    # Segments already known to be straight enough
+    settled = np.zeros(x_values.size - 1, dtype=bool)
+    min_width = (x_max - x_min) * MIN_WIDTH
+
+    while x_values.size < max_points:
+        scale = _y_scale(x_values, y_values)
+        left, right = x_values[:-1], x_values[1:]
+        candidates = np.nonzero(~settled & (right - left > min_width))[0]
+        if candidates.size == 0:
+            break
+
+        middle = (left[candidates] + right[candidates]) / 2
+        with np.errstate(all='ignore'):
+            y_middle = np.asarray(func(middle), dtype=float)
+        y_left, y_right = y_values[candidates], y_values[candidates + 1]
+
+        finite = np.isfinite(y_left) & np.isfinite(y_right) & np.isfinite(y_middle)
+        defined = np.isfinite(y_left).astype(int) + np.isfinite(y_right) + np.isfinite(y_middle)
+        with np.errstate(all='ignore'):
+            error = np.where(finite, np.abs(y_middle - (y_left + y_right) / 2) / scale, 0.0)
+        # Partly defined segments hide a domain edge or a pole: always refine
+        error[(defined > 0) & (defined < 3)] = np.inf
+
+        refine = error > tolerance
+        settled[candidates[~refine]] = True
+        if not refine.any():
+            break
+
+        # Spend the remaining budget on the worst segments first
+        budget = max_points - x_values.size
+        chosen = np.nonzero(refine)[0]
+        if chosen.size > budget:
+            chosen = chosen[np.argsort(-error[chosen], kind='stable')[:budget]]
+            chosen.sort()
+        segments = candidates[chosen]
+
+        x_values = np.insert(x_values, segments + 1, middle[chosen])
+        y_values = np.insert(y_values, segments + 1, y_middle[chosen])
+        # Each split segment becomes two unsettled ones
+        settled = np.insert(settled, segments + 1, False)
+
+    return break_discontinuities(x_values, y_values)
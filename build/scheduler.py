@@ -0,0 +1,342 @@
+import importlib
+import itertools
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple, Union
+
+
+# Workers run this file as a script, so importing it must stay free of tkinter
+WORKER_SCRIPT = Path(__file__).absolute()
+
+# A callable, or a "module:function" reference resolved inside the worker so
+# the submitting process never has to import the module itself
+Task = Union[Callable, str]
+
+# Sent by a worker once its initializer and preloads are done
+READY = "ready"
+
+
+def resolve(task: Task) -> Callable:
+    """Return task itself, or import the function a "module:function" reference names."""
+    if not isinstance(task, str):
+        return task
+    module_name, _, name = task.partition(":")
+    if not name:
+        raise ValueError(f"Task reference '{task}' must look like 'module:function'")
+    return getattr(importlib.import_module(module_name), name)
+
+
+class _Job:
+    """A unit of work waiting for, or running on, a worker process."""
+
+    def __init__(self, job_id: int, func: Task, args: tuple, kwargs: dict,
+                 on_result: Optional[Callable], on_error: Optional[Callable],
+                 timeout: Optional[float], group: Optional[str]):
+        self.id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_result = on_result
+        self.on_error = on_error
+        self.timeout = timeout
+        self.group = group
+        self.started = None
+
+
+class _Worker:
+    """
+    A child Python process that executes pickled jobs one at a time.
+
+    Jobs and results travel as pickles over the child's stdin/stdout; a reader
+    thread forwards every result to the scheduler's queue. Killing the process
+    is the only way to stop a job, which is exactly what is needed for sympy.
+    A job's clock only starts once the worker reports READY, so the time spent
+    in the initializer and preloads does not count against its budget.
+    """
+
+    def __init__(self, results: queue.Queue, initializer: Optional[Task], initargs: tuple, preload: Tuple[str, ...]):
+        self.job = None
+        self.ready = False
+        self.process = subprocess.Popen(
+            [sys.executable, str(WORKER_SCRIPT)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        pickle.dump((initializer, initargs, preload), self.process.stdin)
+        self.process.stdin.flush()
+        self._reader = threading.Thread(target=self._read_results, args=(results,), daemon=True)
+        self._reader.start()
+
+    def _read_results(self, results: queue.Queue) -> None:
+        while True:
+            try:
+                message = pickle.load(self.process.stdout)
+            except Exception:
+                results.put((self, None))
+                return
+            results.put((self, message))
+
+    def run(self, job: _Job) -> None:
+        """Send a job to the child process."""
+        self.job = job
+        job.started = time.monotonic() if self.ready else None
+        pickle.dump((job.id, job.func, job.args, job.kwargs), self.process.stdin)
+        self.process.stdin.flush()
+
+    def kill(self) -> None:
+        """Terminate the child process, abandoning any running job."""
+        self.job = None
+        try:
+            self.process.kill()
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+
+class ComputeScheduler:
+    """
+    Run expensive calculations in worker processes and deliver the results on
+    the Tk event loop.
+
+    Worker processes are used instead of threads because sympy holds the GIL
+    and cannot be interrupted; a job that exceeds its time budget, or that is
+    cancelled while running, is stopped by killing its worker and starting a
+    fresh one. Callbacks are always invoked from root.after(), so they may
+    update widgets directly.
+
+    Tasks and the initializer may be given as "module:function" strings and
+    heavy modules can be preloaded, so the imports happen in the workers while
+    the UI process stays light.
+    """
+
+    def __init__(self, root, max_workers: int = 2, poll_interval: int = 50,
+                 initializer: Optional[Task] = None, initargs: Tuple = (), preload: Tuple[str, ...] = ()):
+        """
+        Args:
+            root: The Tk root (anything with after/after_cancel)
+            max_workers: Number of worker processes kept alive
+            poll_interval: Milliseconds between checks for finished jobs
+            initializer: Optional callable (or "module:function") run once in every new worker
+            initargs: Arguments for initializer
+            preload: Modules every new worker imports before its first job
+        """
+        self.root = root
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.initializer = initializer
+        self.initargs = initargs
+        self.preload = tuple(preload)
+        self._ids = itertools.count(1)
+        self._pending = deque()
+        self._workers = []
+        self._results = queue.Queue()
+        self._after_id = None
+        self._closed = False
+
+    def start(self) -> None:
+        """Start the worker processes ahead of the first job so they can warm up."""
+        self._ensure_workers()
+
+    def submit(self, func: Task, *args, on_result: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None, timeout: Optional[float] = None,
+               group: Optional[str] = None, **kwargs) -> int:
+        """
+        Queue func(*args, **kwargs) for execution in a worker process.
+
+        Args:
+            func: A picklable, module-level function or a "module:function" reference
+            *args: Positional arguments for func
+            on_result: Called with the return value on the Tk thread
+            on_error: Called with the exception (TimeoutError when the budget
+                is exceeded) on the Tk thread
+            timeout: Time budget in seconds, measured from when the job starts
+                (a new worker's warm-up is not counted)
+            group: Label used by cancel() to find related jobs
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The job id
+        """
+        if self._closed:
+            raise RuntimeError("Scheduler has been shut down")
+        job = _Job(next(self._ids), func, args, kwargs, on_result, on_error, timeout, group)
+        self._pending.append(job)
+        self._dispatch()
+        self._schedule_poll()
+        return job.id
+
+    def cancel(self, group: Optional[str] = None, running: bool = True) -> int:
+        """
+        Cancel queued and running jobs. No callbacks are made for them.
+
+        Args:
+            group: Only cancel jobs submitted with this group (None cancels all)
+            running: Also stop running jobs by killing their workers. Pass
+                False for cheap jobs: they are left to finish (and deliver
+                their callbacks), which is faster than starting a replacement
+                worker that has to redo its imports.
+
+        Returns:
+            Number of jobs cancelled
+        """
+        cancelled = 0
+        for job in list(self._pending):
+            if group is None or job.group == group:
+                self._pending.remove(job)
+                cancelled += 1
+        if not running:
+            return cancelled
+        for worker in list(self._workers):
+            if worker.job is not None and (group is None or worker.job.group == group):
+                self._retire(worker)
+                cancelled += 1
+        if cancelled and not self._closed:
+            self._ensure_workers()
+        return cancelled
+
+    def busy(self, group: Optional[str] = None) -> bool:
+        """Return True while any job (of group, if given) is queued or running."""
+        jobs = list(self._pending) + [w.job for w in self._workers if w.job is not None]
+        return any(group is None or job.group == group for job in jobs)
+
+    def shutdown(self) -> None:
+        """Cancel everything and stop all worker processes."""
+        self._closed = True
+        self._pending.clear()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        for worker in list(self._workers):
+            self._retire(worker)
+
+    def _ensure_workers(self) -> None:
+        while len(self._workers) < self.max_workers:
+            self._workers.append(_Worker(self._results, self.initializer, self.initargs, self.preload))
+
+    def _retire(self, worker: _Worker) -> None:
+        worker.kill()
+        if worker in self._workers:
+            self._workers.remove(worker)
+
+    def _dispatch(self) -> None:
+        self._ensure_workers()
+        for worker in self._workers:
+            if not self._pending:
+                break
+            if worker.job is None:
+                job = self._pending.popleft()
+                try:
+                    worker.run(job)
+                except Exception as e:
+                    # Unpicklable arguments or a dead pipe
+                    worker.job = None
+                    self._deliver(job.on_error, e)
+
+    def _schedule_poll(self) -> None:
+        if self._after_id is None and not self._closed:
+            self._after_id = self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self) -> None:
+        self._after_id = None
+
+        # Deliver finished jobs
+        while True:
+            try:
+                worker, message = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if worker not in self._workers:
+                continue  # Result from a worker that was cancelled or timed out
+            job = worker.job
+            if message == READY:
+                worker.ready = True
+                if job is not None and job.started is None:
+                    job.started = time.monotonic()
+                continue
+            if message is None:
+                self._retire(worker)
+                if job is not None:
+                    self._deliver(job.on_error, RuntimeError("Worker process exited unexpectedly"))
+                continue
+            job_id, ok, value = message
+            if job is None or job.id != job_id:
+                continue
+            worker.job = None
+            self._deliver(job.on_result if ok else job.on_error, value)
+
+        # Enforce time budgets
+        now = time.monotonic()
+        for worker in list(self._workers):
+            job = worker.job
+            if job is not None and job.timeout is not None and job.started is not None \
+                    and now - job.started > job.timeout:
+                self._retire(worker)
+                self._deliver(job.on_error, TimeoutError(f"Calculation exceeded its {job.timeout:g}s time budget"))
+
+        if self._closed:
+            return
+        self._dispatch()
+        if self.busy():
+            self._schedule_poll()
+
+    @staticmethod
+    def _deliver(callback: Optional[Callable], value: Any) -> None:
+        if callback is None:
+            return
+        try:
+            callback(value)
+        except Exception as e:
+            print(f"Error in compute callback: {str(e)}")
+
+
+def _worker_main() -> None:
+    """Entry point of a worker process: run jobs from stdin, write results to stdout."""
+    inbox = sys.stdin.buffer
+    outbox = sys.stdout.buffer
+    # Keep stray prints off the result pipe
+    sys.stdout = sys.stderr
+
+    initializer, initargs, preload = pickle.load(inbox)
+    if initializer is not None:
+        try:
+            resolve(initializer)(*initargs)
+        except Exception as e:
+            print(f"Warning: Worker initializer failed ({str(e)})")
+    # Pay for heavy imports now, while the user is still looking at the window
+    for module_name in preload:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"Warning: Worker could not preload {module_name} ({str(e)})")
+    outbox.write(pickle.dumps(READY))
+    outbox.flush()
+
+    while True:
+        try:
+            job_id, func, args, kwargs = pickle.load(inbox)
+        except EOFError:
+            return
+        try:
+            message = (job_id, True, resolve(func)(*args, **kwargs))
+            payload = pickle.dumps(message)
+        except Exception as e:
+            try:
+                payload = pickle.dumps((job_id, False, e))
+            except Exception:
+                payload = pickle.dumps((job_id, False, RuntimeError(str(e))))
+        outbox.write(payload)
+        outbox.flush()
+
+
+if __name__ == "__main__":
+    _worker_main()
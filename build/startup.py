@@ -0,0 +1,93 @@
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class StartupTimer:
+    """
+    Record how long startup takes: milestones since launch and the cost of
+    individual imports (including those done by warm_up threads).
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        """
+        Args:
+            started: time.perf_counter() value at launch (defaults to now)
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.milestones: List[Tuple[str, float]] = []
+        self.imports: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name: str) -> float:
+        """
+        Record a milestone the first time it is reached.
+
+        Args:
+            name: Milestone name, e.g. "window shown"
+
+        Returns:
+            Seconds since launch
+        """
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            if name not in dict(self.milestones):
+                self.milestones.append((name, elapsed))
+        return elapsed
+
+    @contextmanager
+    def measure(self, name: str):
+        """Time the body of a with block as an import named name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.imports[name] = self.imports.get(name, 0.0) + time.perf_counter() - start
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Return the timings in seconds, e.g. to save them as JSON."""
+        with self._lock:
+            return {"milestones": dict(self.milestones), "imports": dict(self.imports)}
+
+    def report(self) -> str:
+        """Return the timings as a human-readable table."""
+        timings = self.as_dict()
+        lines = ["Startup timings (seconds since launch):"]
+        lines += [f"  {name:34s} {seconds:8.3f}" for name, seconds in timings["milestones"].items()]
+        lines.append("Import timings (seconds):")
+        lines += [f"  {name:34s} {seconds:8.3f}" for name, seconds in timings["imports"].items()]
+        return "\n".join(lines)
+
+
+def warm_up(modules: Iterable[str], timer: Optional[StartupTimer] = None) -> threading.Thread:
+    """
+    Import modules in a background daemon thread.
+
+    A later import of the same module from the main thread returns as soon as
+    the background import finishes (or immediately if it already has).
+    Failures are ignored here; they surface again at the real import.
+
+    Args:
+        modules: Module names, imported in order
+        timer: Optional StartupTimer recording each import as "<name> (background)"
+
+    Returns:
+        The started thread
+    """
+    def run():
+        for module_name in modules:
+            try:
+                if timer is None:
+                    importlib.import_module(module_name)
+                else:
+                    with timer.measure(f"{module_name} (background)"):
+                        importlib.import_module(module_name)
+            except Exception:
+                continue
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,347 @@
+import pickle
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+import sympy as sp
+
+from expression import normalize_expression
+
+
+x = sp.Symbol('x')
+
+# Names produced by expression.normalize_expression that sympify would
+# otherwise read as plain symbols or not know about
+SYMPY_LOCALS: Dict[str, Any] = {
+    'x': x,
+    'e': sp.E,
+    'E': sp.E,
+    'pi': sp.pi,
+    'ln': sp.log,
+    'arcsin': sp.asin,
+    'arccos': sp.acos,
+    'arctan': sp.atan,
+    'abs': sp.Abs,
+}
+
+_MISSING = object()
+
+# Stored with the on-disk results; a store written by another version is emptied
+# when opened. Bump the leading number when the cached values change shape.
+CACHE_VERSION = f"1/sympy-{sp.__version__}"
+
+
+class SymbolicCache:
+    """
+    Bounded LRU cache for symbolic results with an optional on-disk store.
+
+    The in-memory layer keeps at most maxsize entries and evicts the least
+    recently used one. When a path is configured, every computed result is
+    also pickled into a small SQLite database so expressions seen in earlier
+    sessions are answered without running sympy again. The store is tagged
+    with CACHE_VERSION and is emptied when opened by a different version, and
+    a store that cannot be read or written only costs cache misses.
+    """
+
+    def __init__(self, maxsize: int = 256, path: Optional[Union[str, Path]] = None):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._db = None
+        self.path = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_writes = 0
+        if path is not None:
+            self.open(path)
+
+    def open(self, path: Union[str, Path]) -> None:
+        """
+        Attach (or replace) the persistent store at path.
+
+        Args:
+            path: Location of the SQLite database file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(path), timeout=5, check_same_thread=False)
+        try:
+            db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            row = db.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != CACHE_VERSION:
+                db.execute("DELETE FROM results")
+                db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (CACHE_VERSION,))
+            db.commit()
+        except sqlite3.Error:
+            db.close()
+            raise
+        with self._lock:
+            self.close()
+            self._db = db
+            self.path = path
+
+    def close(self) -> None:
+        """Detach the persistent store, keeping the in-memory entries."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+            self._db = None
+            self.path = None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up key in memory, then on disk.
+
+        Args:
+            key: Cache key
+            default: Value returned when key is not cached
+
+        Returns:
+            The cached value or default
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT value FROM results WHERE key = ?", (repr(key),)).fetchone()
+                except sqlite3.Error:
+                    # Locked or damaged store: treat it as a miss
+                    row = None
+                if row is not None:
+                    try:
+                        value = pickle.loads(row[0])
+                    except Exception:
+                        value = _MISSING
+                    if value is not _MISSING:
+                        self.hits += 1
+                        self.disk_hits += 1
+                        self._remember(key, value)
+                        return value
+
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store value under key in memory and, if configured, on disk.
+
+        Args:
+            key: Cache key
+            value: Value to store (must be picklable for the disk store)
+        """
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                                     (repr(key), pickle.dumps(value)))
+                    self._db.commit()
+                    self.disk_writes += 1
+                except (sqlite3.Error, pickle.PicklingError):
+                    pass
+
+    def clear(self, disk: bool = False) -> None:
+        """
+        Drop all in-memory entries and reset the counters.
+
+        Args:
+            disk: Also delete everything from the persistent store
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+            self.disk_hits = self.disk_writes = 0
+            if disk and self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM results")
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Warning: Could not clear the symbolic cache store ({str(e)})")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the cache counters.
+
+        Returns:
+            Dictionary with hits, misses, evictions, disk hits/writes and sizes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "disk_writes": self.disk_writes,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "path": str(self.path) if self.path else None,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Shared cache used by the functions below
+SYMBOLIC_CACHE = SymbolicCache()
+
+
+def configure_cache(maxsize: Optional[int] = None, path: Optional[Union[str, Path]] = None) -> SymbolicCache:
+    """
+    Resize the shared cache and/or attach a persistent store to it.
+
+    Args:
+        maxsize: New maximum number of in-memory entries
+        path: Location of the on-disk store (None leaves it unchanged)
+
+    Returns:
+        The shared SymbolicCache
+    """
+    if maxsize is not None:
+        SYMBOLIC_CACHE.maxsize = maxsize
+    if path is not None:
+        SYMBOLIC_CACHE.open(path)
+    return SYMBOLIC_CACHE
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Return the hit, miss and eviction counters of the shared cache."""
+    return SYMBOLIC_CACHE.stats()
+
+
+def _memoized(operation: str, func_str: str, compute: Callable[[], Any], *args) -> Any:
+    """Return the cached result of operation on func_str, computing it on a miss."""
+    key = (operation, normalize_expression(func_str)) + args
+    value = SYMBOLIC_CACHE.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        SYMBOLIC_CACHE.put(key, value)
+    return value
+
+
+def parse_expression(func_str: str) -> sp.Expr:
+    """
+    Convert a user function string into a sympy expression.
+
+    The string goes through the same normalization as the numeric parser,
+    so implicit multiplication and '^' behave identically.
+
+    Args:
+        func_str: String representation of the function
+
+    Returns:
+        The sympy expression in terms of x
+    """
+    return _memoized("parse", func_str,
+                     lambda: sp.sympify(normalize_expression(func_str), locals=SYMPY_LOCALS))
+
+
+def derivative(func_str: str) -> sp.Expr:
+    """
+    Return the simplified first derivative of a user function.
+
+    Args:
+        func_str: String representation of the function
+
+    Returns:
+        The derivative as a sympy expression
+    """
+    return _memoized("derivative", func_str,
+                     lambda: sp.simplify(sp.diff(parse_expression(func_str), x)))
+
+
+def _compute_antiderivative(func_str: str) -> sp.Expr:
+    integral_expr = sp.simplify(sp.integrate(parse_expression(func_str), x))
+
+    # Handle piecewise integrals by keeping the main case
+    if isinstance(integral_expr, sp.Piecewise):
+        integral_expr = sp.simplify(integral_expr.args[0][0])
+
+    return integral_expr
+
+
+def antiderivative(func_str: str) -> sp.Expr:
+    """
+    Return the simplified indefinite integral of a user function (without + C).
+
+    Args:
+        func_str: String representation of the function
+
+    Returns:
+        The antiderivative as a sympy expression
+    """
+    return _memoized("antiderivative", func_str, lambda: _compute_antiderivative(func_str))
+
+
+def definite_integral(func_str: str, lower_bound: float, upper_bound: float) -> sp.Expr:
+    """
+    Return the exact definite integral of a user function.
+
+    Args:
+        func_str: String representation of the function
+        lower_bound: Lower limit of integration
+        upper_bound: Upper limit of integration
+
+    Returns:
+        The definite integral as a sympy expression
+    """
+    return _memoized("definite", func_str,
+                     lambda: sp.integrate(parse_expression(func_str), (x, lower_bound, upper_bound)),
+                     float(lower_bound), float(upper_bound))
+
+
+def latex(func_str: str, kind: str = "function") -> str:
+    """
+    Return LaTeX for a user function, its derivative or its antiderivative.
+
+    Args:
+        func_str: String representation of the function
+        kind: One of "function", "derivative" or "integral"
+
+    Returns:
+        LaTeX source without surrounding dollar signs
+    """
+    sources = {
+        "function": parse_expression,
+        "derivative": derivative,
+        "integral": antiderivative,
+    }
+    if kind not in sources:
+        raise ValueError(f"Unknown LaTeX kind '{kind}'")
+    return _memoized("latex", func_str, lambda: sp.latex(sources[kind](func_str)), kind)
+
+
+def format_expression(expr: sp.Expr) -> str:
+    """
+    Convert a sympy expression to the calculator's display notation
+    (e.g. "2*x**2" -> "2x^2", "exp(x)" -> "e^(x)").
+
+    Args:
+        expr: The sympy expression
+
+    Returns:
+        Display string for the text fields (curves are built from the
+        expression itself, not from this string)
+    """
+    expr_str = str(expr)
+    expr_str = expr_str.replace('**', '^')
+    # Keep '*' before a number so 2*3^x does not read as 23^x
+    expr_str = re.sub(r'\*(?![\d.])', '', expr_str)
+    expr_str = expr_str.replace('exp', 'e^')
+    return expr_str
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from batch import main, run_job
+
+
+def test_divergent_integral_fails_the_job():
+    result = run_job({"function": "1/x", "lower": -1, "upper": 1})
+    assert result["success"] is False
+    assert result["result"] is None and result["error"] is None
+    json.dumps(result, allow_nan=False)
+
+
+def test_output_is_strict_json(tmp_path):
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text('{"id": 1, "function": "x^2", "lower": 0, "upper": 2}\n'
+                    '{"id": 2, "function": "1/x", "lower": -1, "upper": 1}\n')
+    out = tmp_path / "out.jsonl"
+    assert main([str(jobs), "-o", str(out), "--workers", "0", "--ordered"]) == 1
+    results = [json.loads(line, parse_constant=lambda c: (_ for _ in ()).throw(ValueError(c)))
+               for line in out.read_text().splitlines()]
+    assert [r["success"] for r in results] == [True, False]
+    assert abs(results[0]["result"] - 8 / 3) < 1e-12
+
+
+def test_infinite_bounds_are_written_as_strings(tmp_path):
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text('{"id": 1, "function": "exp(-x)", "lower": 0, "upper": "inf"}\n'
+                    '{"id": 2, "function": "x^2", "lower": 0, "upper": 1}\n')
+    out = tmp_path / "out.jsonl"
+    assert main([str(jobs), "-o", str(out), "--workers", "0", "--ordered"]) == 0
+    results = [json.loads(line) for line in out.read_text().splitlines()]
+    assert results[0]["upper_bound"] == "inf"
+    assert abs(results[0]["result"] - 1) < 1e-10
+    assert results[1]["success"] is True
+
+
+@pytest.mark.parametrize("bound", ["nan", float("nan")])
+def test_nan_bound_is_rejected(bound):
+    result = run_job({"function": "x", "lower": 0, "upper": bound})
+    assert result["success"] is False
+    assert result["message"] == "Bounds must be numbers"
+
+
+def test_unwritable_result_does_not_stop_the_run(tmp_path, monkeypatch):
+    import batch
+    monkeypatch.setattr(batch, "run_jobs", lambda *args: iter([
+        {"index": 0, "id": 1, "success": True, "result": float("nan")},
+        {"index": 1, "id": 2, "success": True, "result": 1.0},
+    ]))
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text("")
+    out = tmp_path / "out.jsonl"
+    assert main([str(jobs), "-o", str(out), "--workers", "0"]) == 1
+    results = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [(r["id"], r["success"]) for r in results] == [(1, False), (2, True)]
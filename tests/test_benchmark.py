@@ -0,0 +1,41 @@
+import math
+import time
+
+from benchmark import Timing, _record, compare, time_call
+
+
+def _report(*records):
+    return {"results": list(records)}
+
+
+def test_time_call_measures_short_calls_per_call():
+    timing = time_call(lambda: None, 3)
+    assert 0 < timing.seconds < 1e-4
+    timing = time_call(lambda: time.sleep(0.002), 3)
+    assert 0.002 <= timing.seconds < 0.05
+
+
+def test_compare_flags_slowdowns_of_fast_calls():
+    baseline = _report(_record("parse_user_function[warm]", "1 terms", Timing(1.5e-6, 0.05), 1, "calls/s"))
+    current = _report(_record("parse_user_function[warm]", "1 terms", Timing(130e-6, 0.05), 1, "calls/s"))
+    assert len(compare(current, baseline)) == 1
+    assert compare(baseline, baseline) == []
+
+
+def test_compare_ignores_slowdowns_within_the_measured_noise():
+    baseline = _report(_record("integrate_function", "x^2", Timing(1e-3, 0.3), 1, "integrals/s"))
+    current = _report(_record("integrate_function", "x^2", Timing(1.8e-3, 0.1), 1, "integrals/s"))
+    assert compare(current, baseline) == []
+
+
+def test_compare_does_not_gate_single_shot_timings():
+    baseline = _report(_record("phase:symbolic", "x^2", Timing(0.01, 0.0), 1, "calls/s", gate=False))
+    current = _report(_record("phase:symbolic", "x^2", Timing(1.0, 0.0), 1, "calls/s", gate=False))
+    assert compare(current, baseline) == []
+
+
+def test_compare_flags_errors_that_become_nan():
+    baseline = _report(_record("integrate_function", "x^2", Timing(1e-3, 0.0), 1, "integrals/s", 1e-16))
+    current = _report(_record("integrate_function", "x^2", Timing(1e-3, 0.0), 1, "integrals/s", math.nan))
+    assert len(compare(current, baseline)) == 1
+    assert compare(current, current) == []
@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+import pytest
+
+from expression import compile_expression, normalize_expression
+
+
+@pytest.mark.parametrize("func_str", [
+    "__import__('os')",
+    "x.real",
+    "x.__class__",
+    "x[0]",
+    "(x)[0]",
+    "x < 1",
+    "x == 1",
+    "x and 1",
+    "x if x else 1",
+    "lambda: 1",
+    "open(x)",
+    "sin(x, x)",
+    "sin",
+    "y",
+    "'text'",
+    "[x]",
+    "x = 1",
+])
+def test_rejects_disallowed_syntax(func_str):
+    with pytest.raises(ValueError):
+        compile_expression(func_str)
+
+
+@pytest.mark.parametrize("func_str, expected", [
+    ("x^2 + 2x + 1", "x**2+2*x+1"),
+    ("2sin(x)", "2*sin(x)"),
+    ("xsin(x)", "x*sin(x)"),
+    ("(x+1)(x-1)", "(x+1)*(x-1)"),
+    ("pix", "pi*x"),
+    ("sinh(x)", "sinh(x)"),
+])
+def test_normalizes_implicit_multiplication(func_str, expected):
+    assert normalize_expression(func_str) == expected
+
+
+@pytest.mark.parametrize("func_str", ["2 3", "x^2 3", "1.5.5"])
+def test_rejects_adjacent_numbers(func_str):
+    with pytest.raises(ValueError, match="Missing operator"):
+        normalize_expression(func_str)
+
+
+@pytest.mark.parametrize("func_str, name", [("sinx", "sin"), ("lnx", "ln"), ("2sinx", "sin"),
+                                            ("xsinx", "sin"), ("x + cos", "cos")])
+def test_functions_must_be_called(func_str, name):
+    with pytest.raises(ValueError, match=f"{name} must be followed by '\\('"):
+        normalize_expression(func_str)
+
+
+@pytest.mark.parametrize("func_str, x, expected", [
+    ("2e3", 1.0, 2000.0),
+    ("1e-3x", 5.0, 5e-3),
+    ("1.5E+2", 1.0, 150.0),
+    ("2e", 1.0, 2 * math.e),
+    ("2ex", 2.0, 4 * math.e),
+    ("2e-x", 1.0, 2 * math.e - 1),
+])
+def test_exponent_notation(func_str, x, expected):
+    assert compile_expression(func_str)(x) == pytest.approx(expected)
+
+
+def test_long_names_do_not_hit_the_recursion_limit():
+    assert normalize_expression("x" * 5000).count("x") == 5000
+    with pytest.raises(ValueError, match="Unknown name"):
+        normalize_expression("x" * 5000 + "q")
+
+
+@pytest.mark.parametrize("func_str, points", [
+    ("log(x)", [0.0, -1.0, 1.0]),
+    ("sqrt(x)", [-1.0, 0.0, 4.0]),
+    ("x^0.5", [-2.0, 0.0, 2.0]),
+    ("1/x", [0.0, -0.0, 2.0]),
+    ("arcsin(x)", [2.0, 0.5]),
+    ("x^x", [-0.5, 0.0, 1.5]),
+    ("tan(x) + e^x", [0.3, 800.0]),
+])
+def test_scalar_and_array_paths_agree(func_str, points):
+    func = compile_expression(func_str)
+    array = func(np.array(points))
+    scalar = np.array([func(p) for p in points])
+    np.testing.assert_array_equal(np.isnan(array), np.isnan(scalar))
+    np.testing.assert_allclose(scalar[~np.isnan(scalar)], array[~np.isnan(array)], rtol=1e-12)
+
+
+def test_scalar_domain_edges():
+    assert math.isinf(compile_expression("log(x)")(0.0))
+    assert math.isnan(compile_expression("sqrt(x)")(-1.0))
+    assert math.isinf(compile_expression("1/x")(0.0))
+
+
+def test_parameters_broadcast_against_x():
+    func = compile_expression("a*sin(k*x)", ("a", "k"))
+    values = func(np.array([0.0, 1.0]), a=2.0, k=np.array([[1.0], [3.0]]))
+    np.testing.assert_allclose(values, [[0.0, 2 * np.sin(1.0)], [0.0, 2 * np.sin(3.0)]])
+    with pytest.raises(ValueError, match="missing value for k"):
+        func(1.0, a=1.0)
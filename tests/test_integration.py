@@ -0,0 +1,121 @@
+import math
+import warnings
+
+import numpy as np
+import pytest
+from scipy.integrate import IntegrationWarning
+
+from integration import (adaptive_gauss_kronrod, cumulative_integral, gauss_kronrod, integrate_common_functions,
+                         integrate_intervals, integrate_parameter_sweep, parse_user_function)
+
+
+def test_gauss_kronrod_is_exact_for_polynomials():
+    # GK15 integrates polynomials up to degree 22 exactly
+    values, errors = gauss_kronrod(lambda x: x ** 10, np.array([0.0, -1.0]), np.array([1.0, 2.0]))
+    np.testing.assert_allclose(values, [1 / 11, (2 ** 11 + 1) / 11], rtol=1e-13)
+
+
+@pytest.mark.parametrize("func_str", list(integrate_common_functions()))
+def test_adaptive_matches_analytical_integrals(func_str):
+    reference = integrate_common_functions()[func_str]
+    lower = np.array([0.25, 0.5, 1.0])
+    upper = np.array([1.25, 1.0, 1.5])
+    values, errors = adaptive_gauss_kronrod(parse_user_function(func_str), lower, upper)
+    np.testing.assert_allclose(values, reference(upper) - reference(lower), rtol=1e-10, atol=1e-12)
+    assert np.all(errors <= 1.49e-8 * np.maximum(1, np.abs(values)))
+
+
+def test_adaptive_warns_when_the_budget_runs_out():
+    with pytest.warns(IntegrationWarning):
+        value, error = adaptive_gauss_kronrod(parse_user_function("1/sqrt(x)"), 0.0, 1.0)
+    assert abs(value - 2.0) < 1e-4
+    assert error > abs(value - 2.0) / 10
+
+
+def test_adaptive_warns_at_a_pole_on_a_node():
+    # The GK15 centre node of [-1, 1] is the pole
+    with pytest.warns(IntegrationWarning):
+        adaptive_gauss_kronrod(parse_user_function("1/x"), -1.0, 1.0)
+    with pytest.warns(IntegrationWarning):
+        cumulative_integral(parse_user_function("1/x"), np.linspace(-1, 1, 5))
+
+
+def test_adaptive_handles_a_removable_singularity_on_a_node():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        value, _ = adaptive_gauss_kronrod(parse_user_function("sin(x)/x"), -1.0, 1.0)
+    assert abs(value - 1.8921661407343662) < 1e-12
+
+
+def test_adaptive_does_not_warn_when_converged():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        adaptive_gauss_kronrod(parse_user_function("e^(-x^2)"), -5.0, 5.0)
+
+
+def test_cumulative_integral():
+    x = np.linspace(-1.0, 2.0, 301)
+    values = cumulative_integral(parse_user_function("cos(x)"), x, 0.0)
+    expected = np.where(x > 0, np.sin(x), 0.0)
+    np.testing.assert_allclose(values, expected, atol=1e-13)
+
+
+def test_scalar_only_functions_are_supported():
+    values, _ = adaptive_gauss_kronrod(math.exp, [0.0, 1.0], [1.0, 2.0])
+    np.testing.assert_allclose(values, [math.e - 1, math.e ** 2 - math.e])
+
+
+# Ordinary, reversed, zero-width and negative intervals
+LOWER = np.array([0.0, 2.0, 1.5, -3.0])
+UPPER = np.array([2.0, 0.0, 1.5, -1.0])
+
+
+@pytest.mark.parametrize("method, options", [("adaptive", {}), ("fixed", {"panels": 8}), ("quad_vec", {})])
+def test_integrate_intervals_values(method, options):
+    values, errors = integrate_intervals(parse_user_function("cos(x) + x^2"), LOWER, UPPER, method=method, **options)
+    exact = np.sin(UPPER) - np.sin(LOWER) + (UPPER ** 3 - LOWER ** 3) / 3
+    assert values.shape == errors.shape == LOWER.shape
+    np.testing.assert_allclose(values, exact, atol=1e-10)
+    assert values[2] == 0.0
+    assert np.all(errors >= 0)
+
+
+def test_integrate_intervals_broadcasts_bounds_and_params():
+    func = parse_user_function("a*x", ("a",))
+    values, _ = integrate_intervals(func, 0.0, UPPER[:, None], params={"a": np.array([1.0, 2.0, 3.0])})
+    assert values.shape == (4, 3)
+    np.testing.assert_allclose(values, np.array([1.0, 2.0, 3.0]) * UPPER[:, None] ** 2 / 2, atol=1e-12)
+
+
+def _sweep_exact(a, k):
+    return a * (1 - np.cos(k * np.pi)) / k
+
+
+@pytest.mark.parametrize("method", ["adaptive", "fixed", "quad_vec"])
+def test_parameter_sweep_broadcast(method):
+    a = np.array([1.0, 2.0, 3.0])[:, None]
+    ks = np.linspace(0.5, 5.0, 10)
+    options = {"panels": 16} if method == "fixed" else {}
+    values, errors = integrate_parameter_sweep("a*sin(k*x)", 0, np.pi, {"a": a, "k": ks}, method, **options)
+    assert values.shape == errors.shape == (3, 10)
+    np.testing.assert_allclose(values, _sweep_exact(a, ks), atol=1e-9)
+
+
+def test_parameter_sweep_grid():
+    a = np.array([1.0, 2.0, 3.0])
+    ks = np.linspace(0.5, 5.0, 10)
+    values, _ = integrate_parameter_sweep("a*sin(k*x)", 0, np.pi, {"a": a, "k": ks}, grid=True)
+    assert values.shape == (3, 10)
+    np.testing.assert_allclose(values, _sweep_exact(a[:, None], ks), atol=1e-9)
+    # The axes follow the order the parameters are given in
+    values, _ = integrate_parameter_sweep("a*sin(k*x)", 0, np.pi, {"k": ks, "a": a}, grid=True)
+    assert values.shape == (10, 3)
+    np.testing.assert_allclose(values, _sweep_exact(a, ks[:, None]), atol=1e-9)
+
+
+@pytest.mark.parametrize("method", ["adaptive", "fixed", "quad_vec"])
+@pytest.mark.parametrize("upper", [np.inf, np.nan])
+def test_integrate_intervals_rejects_non_finite_bounds(method, upper):
+    func = parse_user_function("e^(-x^2)")
+    with pytest.raises(ValueError, match="finite"):
+        integrate_intervals(func, [0.0, 0.0], [1.0, upper], method=method)
@@ -0,0 +1,21 @@
+import numpy as np
+
+import symbolic
+from pipeline import exact_integral, symbolic_forms
+
+
+def test_analytic_curves_come_from_the_sympy_expression():
+    result = symbolic_forms("2*3^x")
+    x, y = result["x_integral"], result["y_integral"]
+    np.testing.assert_allclose(y, 2 * 3 ** x / np.log(3), rtol=1e-12)
+    assert result["integral"] == "2*3^x/log(3)"
+
+
+def test_display_strings_keep_multiplication_between_numbers():
+    assert symbolic.format_expression(symbolic.antiderivative("2*3^x")) == "2*3^x/log(3)"
+    assert symbolic.format_expression(symbolic.derivative("x^2sin(x)")) == "x(xcos(x) + 2sin(x))"
+
+
+def test_exact_integral_is_a_separate_job():
+    assert "exact_integral" not in symbolic_forms("x^2", (0, 2))
+    assert exact_integral("x^2", (0, 2))["exact_integral"] == "8/3"
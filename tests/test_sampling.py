@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+import pytest
+
+from expression import compile_expression
+from pipeline import X_RANGE, plot_limits
+from sampling import SampleCache, adaptive_sample, break_discontinuities
+
+
+def _nan_near(x_values, y_values, point, distance=1e-2):
+    return np.any(np.isnan(y_values) & (np.abs(x_values - point) < distance))
+
+
+@pytest.mark.parametrize("func_str, poles", [
+    ("tan(x)", [-3 * math.pi / 2, -math.pi / 2, math.pi / 2, 3 * math.pi / 2]),
+    ("1/x", [0.0]),
+])
+def test_poles_are_broken_with_nan(func_str, poles):
+    x_values, y_values = adaptive_sample(compile_expression(func_str), *X_RANGE)
+    for pole in poles:
+        assert _nan_near(x_values, y_values, pole)
+    # Away from the poles the curve is continuous
+    far = np.min(np.abs(x_values[:, None] - np.array(poles)), axis=1) > 0.1
+    assert np.isfinite(y_values[far]).all()
+
+
+def test_smooth_functions_need_few_points():
+    x_values, y_values = adaptive_sample(compile_expression("x^2"), *X_RANGE)
+    assert x_values.size < 200
+    assert np.isfinite(y_values).all()
+    np.testing.assert_allclose(y_values, x_values ** 2)
+
+
+@pytest.mark.parametrize("max_points", [100, 300, 1000])
+def test_point_budget_is_respected(max_points):
+    x_values, y_values = adaptive_sample(compile_expression("sin(1/x)"), *X_RANGE, max_points=max_points)
+    # Only the NaN separators inserted at breaks may exceed the budget
+    assert np.count_nonzero(~np.isnan(y_values)) <= max_points
+    assert np.all(np.diff(x_values) > 0)
+
+
+def test_domain_edges_are_refined():
+    x_values, y_values = adaptive_sample(compile_expression("sqrt(x)"), *X_RANGE)
+    defined = x_values[np.isfinite(y_values)]
+    assert defined.min() == 0.0
+    assert np.isnan(y_values[x_values < 0]).all()
+
+
+def test_break_discontinuities_splits_a_jump_and_drops_infinities():
+    x_values = np.linspace(-1, 1, 201)
+    y_values = np.where(x_values < 0.005, 0.0, 1.0)
+    x_out, y_out = break_discontinuities(x_values, y_values)
+    assert x_out.size == x_values.size + 1
+    assert x_out[np.isnan(y_out)] == pytest.approx([0.005])
+
+    x_out, y_out = break_discontinuities(np.arange(4.0), np.array([0.0, 1.0, np.inf, 3.0]))
+    assert np.isnan(y_out[2]) and np.isfinite(np.delete(y_out, 2)).all()
+
+
+def test_sample_cache_reuses_overlapping_samples():
+    func = compile_expression("x sin(x)")
+    cache = SampleCache(func)
+    x_first, y_first = adaptive_sample(cache, -5, 5)
+    first_misses = cache.misses
+    assert first_misses == len(cache)
+
+    # Shifting the view by half its width re-evaluates only the new part
+    x_shifted, y_shifted = adaptive_sample(cache, -2.5, 7.5)
+    assert cache.misses - first_misses < first_misses / 2
+    assert cache.hits > 0
+    np.testing.assert_array_equal(y_shifted, adaptive_sample(func, -2.5, 7.5)[1])
+
+    # The same range again evaluates nothing
+    misses = cache.misses
+    adaptive_sample(cache, -5, 5)
+    assert cache.misses == misses
+
+
+@pytest.mark.parametrize("y_values", [
+    np.full(50, np.nan),
+    np.full(50, np.inf),
+    np.full(50, 3.0),
+])
+def test_plot_limits_are_finite_for_degenerate_data(y_values):
+    limits = plot_limits(np.linspace(*X_RANGE, 50), y_values)
+    assert all(math.isfinite(limit) for limit in limits)
+    assert limits[0] < limits[1] and limits[2] < limits[3]
+
+
+def test_plot_limits_clip_poles():
+    x_values, y_values = adaptive_sample(compile_expression("tan(x)"), *X_RANGE)
+    x_min, x_max, y_min, y_max = plot_limits(x_values, y_values)
+    assert (x_min, x_max) == X_RANGE
+    # The spikes reach far beyond the limits, which still show the bulk of the curve
+    assert np.nanmax(np.abs(y_values)) > 10 * max(abs(y_min), abs(y_max))
+    assert y_min < -1 and y_max > 1
@@ -0,0 +1,124 @@
+import heapq
+import time
+
+import pytest
+
+from scheduler import ComputeScheduler
+
+
+class FakeRoot:
+    """Runs after() callbacks in time order, like Tk's event loop."""
+
+    def __init__(self):
+        self.queue = []
+        self.ids = 0
+
+    def after(self, ms, callback):
+        self.ids += 1
+        heapq.heappush(self.queue, (time.monotonic() + ms / 1000, self.ids, callback))
+        return self.ids
+
+    def after_cancel(self, after_id):
+        self.queue = [entry for entry in self.queue if entry[1] != after_id]
+        heapq.heapify(self.queue)
+
+    def run_until(self, condition, timeout=15.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "timed out waiting for the scheduler"
+            if not self.queue:
+                time.sleep(0.01)
+                continue
+            due, _, callback = heapq.heappop(self.queue)
+            time.sleep(max(0.0, due - time.monotonic()))
+            callback()
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+@pytest.fixture
+def make_scheduler(root):
+    schedulers = []
+
+    def make(**kwargs):
+        kwargs.setdefault("poll_interval", 10)
+        scheduler = ComputeScheduler(root, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown()
+
+
+def _collect(scheduler, root, func, *args, **kwargs):
+    """Submit one job and return ("result" | "error", value) once it is delivered."""
+    outcome = []
+    scheduler.submit(func, *args, on_result=lambda v: outcome.append(("result", v)),
+                     on_error=lambda e: outcome.append(("error", e)), **kwargs)
+    root.run_until(lambda: outcome)
+    return outcome[0]
+
+
+def test_results_and_errors_are_delivered(root, make_scheduler):
+    scheduler = make_scheduler(max_workers=1)
+    assert _collect(scheduler, root, "math:sqrt", 16.0) == ("result", 4.0)
+    kind, error = _collect(scheduler, root, "math:sqrt", -1.0)
+    assert kind == "error" and isinstance(error, ValueError)
+    kind, error = _collect(scheduler, root, "math")
+    assert kind == "error" and "module:function" in str(error)
+
+
+def test_timeout_kills_the_worker_and_a_new_one_takes_over(root, make_scheduler):
+    scheduler = make_scheduler(max_workers=1)
+    scheduler.start()
+    first = scheduler._workers[0].process
+    kind, error = _collect(scheduler, root, "time:sleep", 10, timeout=0.5)
+    assert kind == "error" and isinstance(error, TimeoutError)
+    assert first.wait(timeout=5) is not None
+    assert _collect(scheduler, root, "math:sqrt", 9.0) == ("result", 3.0)
+    assert scheduler._workers[0].process is not first
+
+
+def test_crashed_worker_is_replaced(root, make_scheduler):
+    scheduler = make_scheduler(max_workers=1)
+    kind, error = _collect(scheduler, root, "os:_exit", 3)
+    assert kind == "error" and "exited unexpectedly" in str(error)
+    assert _collect(scheduler, root, "math:sqrt", 4.0) == ("result", 2.0)
+
+
+def test_cancel_stops_a_group_without_callbacks(root, make_scheduler):
+    scheduler = make_scheduler(max_workers=1)
+    calls = []
+    scheduler.submit("time:sleep", 10, on_result=calls.append, on_error=calls.append, group="slow")
+    scheduler.submit("math:sqrt", 1.0, on_result=calls.append, group="slow")
+    scheduler.submit("math:sqrt", 4.0, on_result=calls.append, group="other")
+    running = scheduler._workers[0].process
+    assert scheduler.cancel("slow") == 2
+    assert running.wait(timeout=5) is not None
+    root.run_until(lambda: calls)
+    assert calls == [2.0]
+    assert not scheduler.busy()
+
+
+def test_cancel_without_running_lets_the_running_job_finish(root, make_scheduler):
+    scheduler = make_scheduler(max_workers=1)
+    calls = []
+    scheduler.submit("time:sleep", 0.2, on_result=lambda v: calls.append("slept"), group="numeric")
+    scheduler.submit("math:sqrt", 1.0, on_result=calls.append, group="numeric")
+    running = scheduler._workers[0].process
+    assert scheduler.cancel("numeric", running=False) == 1
+    root.run_until(lambda: not scheduler.busy())
+    assert calls == ["slept"]
+    assert scheduler._workers[0].process is running
+
+
+def test_time_budget_starts_once_the_worker_is_ready(root, make_scheduler):
+    # The initializer takes longer than the job's whole budget
+    scheduler = make_scheduler(max_workers=1, initializer="time:sleep", initargs=(1.0,))
+    assert _collect(scheduler, root, "time:sleep", 0.2, timeout=0.8) == ("result", None)
+    kind, error = _collect(scheduler, root, "time:sleep", 10, timeout=0.5)
+    assert kind == "error" and isinstance(error, TimeoutError)
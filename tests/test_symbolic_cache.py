@@ -0,0 +1,38 @@
+import sqlite3
+
+import symbolic
+from symbolic import SymbolicCache
+
+
+def test_disk_store_round_trip(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    SymbolicCache(path=path).put(("derivative", "x**2"), "2*x")
+    cache = SymbolicCache(path=path)
+    assert cache.get(("derivative", "x**2")) == "2*x"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_store_from_another_version_is_emptied(tmp_path, monkeypatch):
+    path = tmp_path / "cache.sqlite3"
+    SymbolicCache(path=path).put(("derivative", "x**2"), "2*x")
+    monkeypatch.setattr(symbolic, "CACHE_VERSION", "0/old")
+    assert SymbolicCache(path=path).get(("derivative", "x**2")) is None
+
+
+def test_locked_store_is_a_miss(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = SymbolicCache(path=path)
+    cache.put(("derivative", "x**2"), "2*x")
+    cache.clear()
+    cache._db.close()
+    cache._db = sqlite3.connect(str(path), timeout=0)
+
+    blocker = sqlite3.connect(str(path))
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        assert cache.get(("derivative", "x**2"), "default") == "default"
+        cache.put(("derivative", "x**3"), "3*x**2")
+        assert cache.get(("derivative", "x**3")) == "3*x**2"
+    finally:
+        blocker.rollback()
+        blocker.close()